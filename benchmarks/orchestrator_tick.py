@@ -0,0 +1,83 @@
+"""Per-tick latency and history size of the orchestrator bookkeeping reads, local vs. remote activities.
+
+Runs against an ephemeral Temporal dev server with in-memory activities, so
+only the Temporal overhead is measured:
+
+    python -m benchmarks.orchestrator_tick --ticks 20
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import datetime
+
+from temporalio import activity, workflow
+from temporalio.testing import WorkflowEnvironment
+from temporalio.worker import Worker
+
+from core.activity_options import get_activity_options, register_activity_options
+from core.broker_client import BrokerClient, WORKER_QUEUE
+from core.converter import pydantic_data_converter
+from core.worker import new_sandbox_runner
+from libs.workflow_definitions.collectors.collect_workflow import collectors
+from microservices.orchestrator.handlers.collect_orchestration.activities.get_running_slots_activity import \
+    GetRunningSlotsAction, GetRunningSlotsResponse, get_running_slots
+from microservices.orchestrator.handlers.collect_orchestration.activities.prepare_collect_activity import \
+    PrepareCollectAction, PrepareCollectResponse, prepare_collect
+
+
+@activity.defn(name="prepare_collect")
+async def prepare_collect_in_memory(action: PrepareCollectAction) -> PrepareCollectResponse:
+    return PrepareCollectResponse(current_time=datetime.now(), accounts_to_collect=[])
+
+
+@activity.defn(name="get_running_slots")
+async def get_running_slots_in_memory(action: GetRunningSlotsAction) -> GetRunningSlotsResponse:
+    return GetRunningSlotsResponse(slots=[])
+
+
+@workflow.defn(name="orchestrator-tick-benchmark")
+class OrchestratorTickBenchmark:
+    @workflow.run
+    async def run(self) -> None:
+        for platform, platform_configs in collectors.items():
+            await BrokerClient.run_activity(
+                prepare_collect, PrepareCollectAction(platform=platform, num_of_slots=len(platform_configs))
+            )
+            await BrokerClient.run_activity(get_running_slots, GetRunningSlotsAction(platform=platform))
+
+
+async def run_ticks(env: WorkflowEnvironment, ticks: int, local: bool) -> tuple[float, int]:
+    for fn in (prepare_collect, get_running_slots):
+        register_activity_options(fn.__name__, get_activity_options(fn.__name__).model_copy(update=dict(local=local)))
+
+    async with Worker(env.client,
+                      task_queue=WORKER_QUEUE,
+                      workflows=[OrchestratorTickBenchmark],
+                      activities=[prepare_collect_in_memory, get_running_slots_in_memory],
+                      workflow_runner=new_sandbox_runner()):
+        latencies = []
+        history_length = 0
+        for _ in range(ticks):
+            started_at = time.monotonic()
+            handle = await env.client.start_workflow(OrchestratorTickBenchmark.run,
+                                                     id=str(uuid.uuid4()), task_queue=WORKER_QUEUE)
+            await handle.result()
+            latencies.append(time.monotonic() - started_at)
+            history_length = len((await handle.fetch_history()).events)
+
+    return sum(latencies) / len(latencies), history_length
+
+
+async def main(ticks: int):
+    async with await WorkflowEnvironment.start_local(data_converter=pydantic_data_converter) as env:
+        for local in (False, True):
+            latency, history_length = await run_ticks(env, ticks, local)
+            mode = "local" if local else "remote"
+            print(f"{mode:>6}: {latency * 1000:.1f}ms per tick, {history_length} history events per tick")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ticks", type=int, default=20)
+    asyncio.run(main(parser.parse_args().ticks))
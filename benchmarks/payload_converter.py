@@ -0,0 +1,94 @@
+"""Encode and decode throughput of the activity responses through the data converter.
+
+Compares the current payload converter with the previous one, which went
+through ``json.dumps`` with the v1 ``pydantic_encoder`` and decoded
+reflectively. Neither compresses, so ``PAYLOAD_COMPRESSION`` doesn't skew
+the comparison:
+
+    python -m benchmarks.payload_converter --slots 10000
+"""
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+from pydantic.json import pydantic_encoder
+from temporalio.api.common.v1 import Payload
+from temporalio.converter import CompositePayloadConverter, DataConverter, DefaultPayloadConverter, \
+    JSONPlainPayloadConverter
+
+from core.converter import PydanticPayloadConverter
+from microservices.collectors.handlers.collect.activities.collect_activity import CollectResponse, CollectResult
+from microservices.orchestrator.handlers.collect_orchestration.activities.get_running_slots_activity import \
+    GetRunningSlotsResponse, RunningSlot
+from microservices.orchestrator.handlers.collect_orchestration.activities.prepare_collect_activity import \
+    AccountToCollect, PrepareCollectResponse
+
+
+class LegacyJSONPayloadConverter(JSONPlainPayloadConverter):
+    def to_payload(self, value: Any) -> Optional[Payload]:
+        return Payload(
+            metadata={"encoding": self.encoding.encode()},
+            data=json.dumps(value, separators=(",", ":"), sort_keys=True, default=pydantic_encoder).encode(),
+        )
+
+
+class LegacyPayloadConverter(CompositePayloadConverter):
+    def __init__(self) -> None:
+        super().__init__(
+            *(
+                c if not isinstance(c, JSONPlainPayloadConverter) else LegacyJSONPayloadConverter()
+                for c in DefaultPayloadConverter.default_encoding_payload_converters
+            )
+        )
+
+
+legacy_data_converter = DataConverter(payload_converter_class=LegacyPayloadConverter)
+pydantic_data_converter = DataConverter(payload_converter_class=PydanticPayloadConverter)
+
+
+def build_payloads(num_of_accounts: int, num_of_slots: int) -> list[Any]:
+    now = datetime(2024, 1, 1)
+    return [
+        CollectResponse(result=CollectResult.CONTINUE, num_of_tx=100, to_date=now),
+        PrepareCollectResponse(current_time=now, accounts_to_collect=[
+            AccountToCollect(account=f"0x{i:040x}", last_synced_at=now - timedelta(minutes=i))
+            for i in range(num_of_accounts)
+        ]),
+        GetRunningSlotsResponse(slots=[
+            RunningSlot(id=i, start_time=now - timedelta(seconds=i)) for i in range(num_of_slots)
+        ]),
+    ]
+
+
+async def measure(converter: DataConverter, value: Any, rounds: int) -> tuple[float, float]:
+    started_at = time.perf_counter()
+    for _ in range(rounds):
+        payloads = await converter.encode([value])
+    encode_time = (time.perf_counter() - started_at) / rounds
+
+    started_at = time.perf_counter()
+    for _ in range(rounds):
+        await converter.decode(payloads, [type(value)])
+    decode_time = (time.perf_counter() - started_at) / rounds
+
+    return encode_time, decode_time
+
+
+async def main(num_of_accounts: int, num_of_slots: int, rounds: int):
+    for value in build_payloads(num_of_accounts, num_of_slots):
+        for name, converter in (("legacy", legacy_data_converter), ("pydantic", pydantic_data_converter)):
+            encode_time, decode_time = await measure(converter, value, rounds)
+            print(f"{type(value).__name__:>24} {name:>8}: "
+                  f"encode {encode_time * 1e6:10.1f}us, decode {decode_time * 1e6:10.1f}us")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--accounts", type=int, default=1000)
+    parser.add_argument("--slots", type=int, default=10000)
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.accounts, args.slots, args.rounds))
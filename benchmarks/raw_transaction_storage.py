@@ -0,0 +1,107 @@
+"""Insert and per-account range scan throughput of RawTransaction index layouts.
+
+Needs a Mongo reachable through ``MONGO_URI``, and writes to a scratch
+``benchmarks`` database:
+
+    python -m benchmarks.raw_transaction_storage --accounts 1000 --tx-per-account 1000
+
+``timestamp-only`` is the layout before the (platform, account, timestamp)
+index, where a per-account range read walks the whole time range of every
+account. Time-series collections are not compared: they can't carry the
+unique (platform, account, key) index the writer's idempotent upserts rely on.
+"""
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta
+
+import pymongo
+from pymongo import IndexModel, ReplaceOne
+
+from core.connections import Connections
+from libs.data_types.platform import Platform
+from libs.schema.raw_transaction import RawTransaction
+
+START = datetime(2024, 1, 1)
+BATCH_SIZE = 1000
+
+LAYOUTS = {
+    "timestamp-only": [
+        IndexModel([('metadata.timestamp', pymongo.ASCENDING)]),
+        IndexModel([('metadata.platform', pymongo.ASCENDING),
+                    ('metadata.account', pymongo.ASCENDING),
+                    ('key', pymongo.ASCENDING)], unique=True),
+    ],
+    "account-time": [
+        IndexModel(index) if isinstance(index, str) else index for index in RawTransaction.Settings.indexes
+    ],
+}
+
+
+def build_transactions(rng: random.Random, num_of_accounts: int, tx_per_account: int) -> list[dict]:
+    transactions = []
+    for i in range(tx_per_account * num_of_accounts):
+        account = f"0x{i % num_of_accounts:040x}"
+        transactions.append({
+            "from_address": str(rng.randint(1, 10 ** 12)),
+            "to_address": str(rng.randint(1, 10 ** 12)),
+            "amount": rng.randint(1, 10 ** 12),
+            "metadata": {"account": account, "platform": Platform.ETHEREUM,
+                         "timestamp": START + timedelta(minutes=rng.randint(0, 365 * 24 * 60))},
+            "key": f"{i:016x}",
+        })
+    return transactions
+
+
+async def insert(collection, transactions: list[dict]) -> float:
+    started_at = time.perf_counter()
+    for i in range(0, len(transactions), BATCH_SIZE):
+        await collection.bulk_write([
+            ReplaceOne({"metadata.platform": tx["metadata"]["platform"],
+                        "metadata.account": tx["metadata"]["account"],
+                        "key": tx["key"]}, tx, upsert=True)
+            for tx in transactions[i:i + BATCH_SIZE]
+        ], ordered=False)
+    return len(transactions) / (time.perf_counter() - started_at)
+
+
+async def range_scan(collection, rng: random.Random, num_of_accounts: int, num_of_scans: int) -> tuple[float, float]:
+    docs_examined = 0
+    started_at = time.perf_counter()
+    for _ in range(num_of_scans):
+        since = START + timedelta(days=rng.randint(0, 300))
+        query = {"metadata.platform": Platform.ETHEREUM,
+                 "metadata.account": f"0x{rng.randrange(num_of_accounts):040x}",
+                 "metadata.timestamp": {"$gte": since, "$lt": since + timedelta(days=30)}}
+        await collection.find(query).to_list(None)
+        explain = await collection.find(query).explain()
+        docs_examined += explain["executionStats"]["totalDocsExamined"]
+    return num_of_scans / (time.perf_counter() - started_at), docs_examined / num_of_scans
+
+
+async def main(num_of_accounts: int, tx_per_account: int, num_of_scans: int, seed: int):
+    database = Connections.mongo()["benchmarks"]
+    transactions = build_transactions(random.Random(seed), num_of_accounts, tx_per_account)
+
+    for layout, indexes in LAYOUTS.items():
+        collection = database[f"raw_transaction_{layout}"]
+        await collection.drop()
+        await collection.create_indexes(indexes)
+
+        inserts_per_second = await insert(collection, transactions)
+        scans_per_second, docs_examined = await range_scan(collection, random.Random(seed), num_of_accounts,
+                                                           num_of_scans)
+        print(f"{layout:>16}: {inserts_per_second:10.0f} inserts/s, {scans_per_second:8.1f} range scans/s, "
+              f"{docs_examined:10.1f} docs examined per scan")
+        await collection.drop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--accounts", type=int, default=1000)
+    parser.add_argument("--tx-per-account", type=int, default=1000)
+    parser.add_argument("--scans", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    asyncio.run(main(args.accounts, args.tx_per_account, args.scans, args.seed))
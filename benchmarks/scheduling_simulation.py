@@ -0,0 +1,139 @@
+"""Replays a synthetic account population through a scheduling policy.
+
+Every tick the policy picks as many accounts as there are slot lanes, and
+every pick costs one API call returning up to a page of the transactions
+that piled up since the account was last collected. Candidates are chosen
+as in production: accounts on hold are skipped, ``candidate_pool`` takes
+what prepare_collect would fetch, and a collect updates ``tx_rate`` and
+``hold_until`` as the collect activity does. Compare policies before
+rolling one out:
+
+    python -m benchmarks.scheduling_simulation --policy oldest-first
+    python -m benchmarks.scheduling_simulation --policy expected-yield
+"""
+import argparse
+import math
+import random
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, UTC
+
+from libs.data_types.platform import Platform
+from libs.data_types.priority_tier import PriorityTier
+from libs.scheduling.cooldown import next_cooldown
+from libs.scheduling.policies import AccountStats, POLICIES, get_policy, update_tx_rate
+from libs.scheduling.scheduler import candidate_pool, select_accounts
+
+START = datetime(2024, 1, 1, tzinfo=UTC)
+WARM_UP = timedelta(days=1)
+
+# (share of the population, transactions per hour)
+ACTIVITY_PROFILES = [(0.80, 0.01), (0.15, 1.0), (0.05, 50.0)]
+TIER_SHARES = [(PriorityTier.STANDARD, 0.85), (PriorityTier.PRO, 0.10), (PriorityTier.ENTERPRISE, 0.05)]
+
+
+@dataclass
+class SimulatedAccount:
+    stats: AccountStats
+    true_rate: float
+    backlog: int = 0
+    num_of_new_tx: int = 0
+    empty_streak: int = 0
+    hold_until: datetime = START
+
+
+def build_population(rng: random.Random, num_of_accounts: int) -> list[SimulatedAccount]:
+    accounts = []
+    for i in range(num_of_accounts):
+        true_rate = rng.choices([rate for _, rate in ACTIVITY_PROFILES],
+                                weights=[share for share, _ in ACTIVITY_PROFILES])[0]
+        tier = rng.choices([tier for tier, _ in TIER_SHARES], weights=[share for _, share in TIER_SHARES])[0]
+        # Every account was last collected a day before the replay starts with a rate observed over that day,
+        # as in a running system
+        observed_tx = _poisson(rng, true_rate * WARM_UP.total_seconds() / 3600)
+        stats = AccountStats(account=str(i), platform=Platform.ETHEREUM, last_synced_at=START - WARM_UP,
+                             last_collected_at=START - WARM_UP, priority_tier=tier,
+                             tx_rate=observed_tx / (WARM_UP.total_seconds() / 3600))
+        backlog = _poisson(rng, true_rate * WARM_UP.total_seconds() / 3600)
+        accounts.append(SimulatedAccount(stats=stats, true_rate=true_rate, backlog=backlog))
+    return accounts
+
+
+def simulate(policy_name: str, num_of_accounts: int, picks_per_tick: int, ticks: int,
+             tick: timedelta, page_size: int, seed: int) -> dict[str, float]:
+    rng = random.Random(seed)
+    accounts = build_population(rng, num_of_accounts)
+    by_name = {account.stats.account: account for account in accounts}
+    policy = get_policy(policy_name)
+
+    api_calls = 0
+    collected = 0
+    now = START
+    for _ in range(ticks):
+        now += tick
+        for account in accounts:
+            num_of_new_tx = _poisson(rng, account.true_rate * tick.total_seconds() / 3600)
+            account.backlog += num_of_new_tx
+            account.num_of_new_tx += num_of_new_tx
+
+        eligible = [account.stats for account in accounts if account.hold_until <= now]
+        candidates = candidate_pool(eligible, picks_per_tick * policy.candidate_factor, policy.candidate_orders)
+        for stats in select_accounts(candidates, picks_per_tick, policy, now):
+            account = by_name[stats.account]
+            num_of_tx = min(account.backlog, page_size)
+            account.backlog -= num_of_tx
+            account.empty_streak = 0 if num_of_tx else account.empty_streak + 1
+
+            # As the collect activity does, only a caught-up collect measures the arrival rate
+            if account.backlog == 0:
+                elapsed_hours = (now - stats.last_collected_at).total_seconds() / 3600
+                stats.tx_rate = update_tx_rate(stats.tx_rate, account.num_of_new_tx, elapsed_hours)
+                stats.last_synced_at = now
+                account.hold_until = now + next_cooldown(num_of_tx, account.empty_streak, stats.tx_rate)
+            stats.last_collected_at = now
+            account.num_of_new_tx = 0
+
+            api_calls += 1
+            collected += num_of_tx
+
+    pending_by_tier = defaultdict(list)
+    for account in accounts:
+        pending_by_tier[account.stats.priority_tier].append(account.backlog)
+
+    report = {
+        "api_calls": api_calls,
+        "tx_collected": collected,
+        "tx_per_call": collected / api_calls if api_calls else 0.0,
+    }
+    for tier, backlogs in pending_by_tier.items():
+        report[f"pending_tx_{tier}"] = sum(backlogs) / len(backlogs)
+    return report
+
+
+def _poisson(rng: random.Random, lam: float) -> int:
+    if lam > 30:
+        return max(0, round(rng.gauss(lam, math.sqrt(lam))))
+
+    threshold, k, p = math.exp(-lam), 0, 1.0
+    while True:
+        p *= rng.random()
+        if p <= threshold:
+            return k
+        k += 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="expected-yield")
+    parser.add_argument("--accounts", type=int, default=5000)
+    parser.add_argument("--picks-per-tick", type=int, default=20)
+    parser.add_argument("--ticks", type=int, default=24 * 60)
+    parser.add_argument("--tick-minutes", type=int, default=1)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    result = simulate(args.policy, args.accounts, args.picks_per_tick, args.ticks,
+                      timedelta(minutes=args.tick_minutes), args.page_size, args.seed)
+    for key, value in result.items():
+        print(f"{key:>24}: {value:.2f}")
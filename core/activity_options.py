@@ -0,0 +1,46 @@
+from datetime import timedelta
+
+from pydantic import BaseModel
+from temporalio.common import RetryPolicy
+
+
+class ActivityOptions(BaseModel):
+    """How an activity is scheduled by :py:meth:`BrokerClient.run_activity`.
+
+    Declared next to each activity with ``@workflow_activity(options=...)``,
+    ``profile`` labels the latency and attempt metrics of the activity.
+    A local activity that does not finish within ``local_budget`` is
+    scheduled again as a remote activity on ``task_queue``.
+    """
+    profile: str = "default"
+    start_to_close_timeout: timedelta = timedelta(seconds=60)
+    schedule_to_close_timeout: timedelta | None = None
+    heartbeat_timeout: timedelta | None = None
+    initial_interval: timedelta = timedelta(seconds=1)
+    backoff_coefficient: float = 2.0
+    maximum_interval: timedelta | None = None
+    maximum_attempts: int = 0
+    task_queue: str | None = None
+    local: bool = False
+    local_budget: timedelta | None = None
+
+    def retry_policy(self) -> RetryPolicy:
+        return RetryPolicy(
+            initial_interval=self.initial_interval,
+            backoff_coefficient=self.backoff_coefficient,
+            maximum_interval=self.maximum_interval,
+            maximum_attempts=self.maximum_attempts,
+        )
+
+
+DEFAULT_ACTIVITY_OPTIONS = ActivityOptions()
+
+_activity_options: dict[str, ActivityOptions] = {}
+
+
+def register_activity_options(activity_name: str, options: ActivityOptions) -> None:
+    _activity_options[activity_name] = options
+
+
+def get_activity_options(activity_name: str) -> ActivityOptions:
+    return _activity_options.get(activity_name, DEFAULT_ACTIVITY_OPTIONS)
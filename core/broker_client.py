@@ -1,38 +1,73 @@
 import os
-from datetime import timedelta
 from typing import Type
 
 from temporalio import workflow
 from temporalio.client import Client
 from temporalio.common import WorkflowIDReusePolicy, SearchAttributes
+from temporalio.exceptions import ActivityError, TimeoutError
 from temporalio.types import ParamType, ReturnType, CallableAsyncSingleParam
-from temporalio.workflow import ParentClosePolicy
+from temporalio.workflow import ParentClosePolicy, ChildWorkflowHandle
 
-from core.converter import pydantic_data_converter
+from core.activity_options import get_activity_options
+from core.connections import Connections
+from core.metrics import metrics
 from core.workflow_definition import WorkflowDefinition
 
 WORKER_QUEUE = os.getenv("WORKER_QUEUE", "default")
 
 
 class BrokerClient:
-    _client: Client = None
-
-    @classmethod
-    async def client(cls) -> Client:
-        if cls._client is None:
-            cls._client = await Client.connect("localhost:7233", data_converter=pydantic_data_converter)
-        return cls._client
+    @staticmethod
+    async def client() -> Client:
+        return await Connections.temporal()
 
     @staticmethod
     async def run_activity(activity: CallableAsyncSingleParam[ParamType, ReturnType],
                            param: ParamType,
-                           local: bool = False) -> ReturnType:
-        if local:
-            return await workflow.execute_local_activity(activity, param,
-                                                         start_to_close_timeout=timedelta(seconds=60))
+                           **overrides) -> ReturnType:
+        """Run an activity with the options declared next to it, ``overrides`` replace single options.
+
+        Remote activities run on the task queue of the calling workflow unless
+        the options name one, so collect runs on the queue of its platform.
+        """
+        options = get_activity_options(activity.__name__)
+        if overrides:
+            options = options.model_copy(update=overrides)
 
-        return await workflow.execute_activity(activity, param, task_queue=WORKER_QUEUE,
-                                               start_to_close_timeout=timedelta(seconds=60))
+        started_at = workflow.now()
+        local = options.local
+        try:
+            if local:
+                try:
+                    return await workflow.execute_local_activity(
+                        activity, param,
+                        start_to_close_timeout=options.local_budget or options.start_to_close_timeout,
+                        schedule_to_close_timeout=options.local_budget or options.schedule_to_close_timeout,
+                        retry_policy=options.retry_policy()
+                    )
+                except ActivityError as e:
+                    if options.local_budget is None or not isinstance(e.cause, TimeoutError):
+                        raise
+
+                    print(f"Local {activity.__name__} exceeded {options.local_budget}, falling back to remote")
+                    if not workflow.unsafe.is_replaying():
+                        metrics.increment("activity_local_fallbacks_total",
+                                          activity=activity.__name__, profile=options.profile)
+                    local = False
+
+            return await workflow.execute_activity(
+                activity, param,
+                task_queue=options.task_queue or workflow.info().task_queue,
+                start_to_close_timeout=options.start_to_close_timeout,
+                schedule_to_close_timeout=options.schedule_to_close_timeout,
+                heartbeat_timeout=options.heartbeat_timeout,
+                retry_policy=options.retry_policy()
+            )
+        finally:
+            if not workflow.unsafe.is_replaying():
+                latency = (workflow.now() - started_at).total_seconds()
+                metrics.observe("activity_schedule_to_result_seconds", latency,
+                                activity=activity.__name__, profile=options.profile, local=local)
 
     @classmethod
     async def run_child_workflow(cls, definition: Type[WorkflowDefinition],
@@ -42,7 +77,7 @@ class BrokerClient:
                                  workflow_id: str | None = None,
                                  search_attributes: SearchAttributes | None = None,
                                  **workflow_identifiers) -> ReturnType:
-        queue = definition.queue
+        queue = definition.task_queue(arg)
         workflow_name = definition.name()
         workflow_id = workflow_id or definition.generate_workflow_id(**workflow_identifiers)
 
@@ -56,3 +91,23 @@ class BrokerClient:
         )
 
         return response
+
+    @classmethod
+    async def start_child_workflow(cls, definition: Type[WorkflowDefinition],
+                                   arg: ParamType,
+                                   parent_close_policy: ParentClosePolicy = ParentClosePolicy.TERMINATE,
+                                   id_reuse_policy: WorkflowIDReusePolicy = WorkflowIDReusePolicy.ALLOW_DUPLICATE,
+                                   workflow_id: str | None = None,
+                                   search_attributes: SearchAttributes | None = None,
+                                   **workflow_identifiers) -> ChildWorkflowHandle:
+        """Like :py:meth:`run_child_workflow` but returns as soon as the child has started."""
+        workflow_id = workflow_id or definition.generate_workflow_id(**workflow_identifiers)
+
+        return await workflow.start_child_workflow(
+            definition.name(), arg,
+            id=workflow_id, task_queue=definition.task_queue(arg),
+            result_type=definition.response,
+            parent_close_policy=parent_close_policy,
+            id_reuse_policy=id_reuse_policy,
+            search_attributes=search_attributes
+        )
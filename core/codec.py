@@ -0,0 +1,81 @@
+import os
+import zlib
+from typing import Callable, Sequence
+
+from temporalio.api.common.v1 import Payload
+from temporalio.converter import PayloadCodec
+
+from core.metrics import metrics
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+PAYLOAD_COMPRESSION = os.getenv("PAYLOAD_COMPRESSION", "zlib")
+PAYLOAD_COMPRESSION_THRESHOLD = int(os.getenv("PAYLOAD_COMPRESSION_THRESHOLD", 4096))
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 3
+
+COMPRESSED_ENCODINGS = {b"binary/zlib", b"binary/zstd"}
+
+
+def _compressors() -> dict[str, tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]]:
+    compressors = {
+        "zlib": (lambda data: zlib.compress(data, ZLIB_LEVEL), zlib.decompress),
+    }
+    if zstandard is not None:
+        compressors["zstd"] = (zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress,
+                               zstandard.ZstdDecompressor().decompress)
+    return compressors
+
+
+class CompressionCodec(PayloadCodec):
+    """Compresses payloads larger than ``threshold`` bytes.
+
+    The whole payload, metadata included, is compressed into a new payload
+    whose ``encoding`` is ``binary/<algorithm>``, so smaller payloads and
+    payloads written before compression was enabled are decoded as is.
+    """
+
+    def __init__(self, algorithm: str = PAYLOAD_COMPRESSION, threshold: int = PAYLOAD_COMPRESSION_THRESHOLD):
+        compressors = _compressors()
+        if algorithm not in compressors:
+            raise ValueError(f"Unsupported payload compression {algorithm}, expected one of {sorted(compressors)}")
+
+        self.algorithm = algorithm
+        self.threshold = threshold
+        self._compress = compressors[algorithm][0]
+        self._decompressors = {f"binary/{name}".encode(): decompress for name, (_, decompress) in compressors.items()}
+
+    async def encode(self, payloads: Sequence[Payload]) -> list[Payload]:
+        return [self._encode(payload) for payload in payloads]
+
+    async def decode(self, payloads: Sequence[Payload]) -> list[Payload]:
+        return [self._decode(payload) for payload in payloads]
+
+    def _encode(self, payload: Payload) -> Payload:
+        data = payload.SerializeToString()
+        if len(data) < self.threshold:
+            return payload
+
+        compressed = self._compress(data)
+        metrics.increment("payload_bytes_before_compression_total", len(data), algorithm=self.algorithm)
+        metrics.increment("payload_bytes_after_compression_total", min(len(compressed), len(data)),
+                          algorithm=self.algorithm)
+
+        # Already compressed or random data can grow
+        if len(compressed) >= len(data):
+            return payload
+
+        return Payload(metadata={"encoding": f"binary/{self.algorithm}".encode()}, data=compressed)
+
+    def _decode(self, payload: Payload) -> Payload:
+        encoding = payload.metadata.get("encoding", b"")
+        if encoding not in COMPRESSED_ENCODINGS:
+            return payload
+
+        decompress = self._decompressors.get(encoding)
+        if decompress is None:
+            raise ValueError(f"Payload is encoded as {encoding.decode()} which is not supported by this worker")
+        return Payload.FromString(decompress(payload.data))
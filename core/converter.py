@@ -1,7 +1,7 @@
-import json
-from typing import Any, Optional
+from typing import Any, Optional, Type
 
-from pydantic.json import pydantic_encoder
+import pydantic_core
+from pydantic import BaseModel
 from temporalio.api.common.v1 import Payload
 from temporalio.converter import (
     CompositePayloadConverter,
@@ -10,16 +10,25 @@ from temporalio.converter import (
     JSONPlainPayloadConverter,
 )
 
+from core.codec import CompressionCodec, PAYLOAD_COMPRESSION
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 class PydanticJSONPayloadConverter(JSONPlainPayloadConverter):
     """Pydantic JSON payload converter.
 
-    This extends the :py:class:`JSONPlainPayloadConverter` to override
-    :py:meth:`to_payload` using the Pydantic encoder.
+    This extends the :py:class:`JSONPlainPayloadConverter` to serialize with
+    pydantic-core, and to validate models straight from the payload bytes
+    when the expected type is a Pydantic model. Plain values go through
+    orjson when it is installed.
     """
 
     def to_payload(self, value: Any) -> Optional[Payload]:
-        """Convert all values with Pydantic encoder or fail.
+        """Convert all values with pydantic-core or fail.
 
         Like the base class, we fail if we cannot convert. This payload
         converter is expected to be the last in the chain, so it can fail if
@@ -28,11 +37,22 @@ class PydanticJSONPayloadConverter(JSONPlainPayloadConverter):
         # We let JSON conversion errors be thrown to caller
         return Payload(
             metadata={"encoding": self.encoding.encode()},
-            data=json.dumps(
-                value, separators=(",", ":"), sort_keys=True, default=pydantic_encoder
-            ).encode(),
+            data=_dumps(value),
         )
 
+    def from_payload(self, payload: Payload, type_hint: Optional[Type] = None) -> Any:
+        if isinstance(type_hint, type) and issubclass(type_hint, BaseModel):
+            return type_hint.model_validate_json(payload.data)
+        return super().from_payload(payload, type_hint)
+
+
+def _dumps(value: Any) -> bytes:
+    if isinstance(value, BaseModel):
+        return value.__pydantic_serializer__.to_json(value)
+    if orjson is not None:
+        return orjson.dumps(value, default=pydantic_core.to_jsonable_python)
+    return pydantic_core.to_json(value)
+
 
 class PydanticPayloadConverter(CompositePayloadConverter):
     """Payload converter that replaces Temporal JSON conversion with Pydantic
@@ -51,6 +71,7 @@ class PydanticPayloadConverter(CompositePayloadConverter):
 
 
 pydantic_data_converter = DataConverter(
-    payload_converter_class=PydanticPayloadConverter
+    payload_converter_class=PydanticPayloadConverter,
+    payload_codec=CompressionCodec() if PAYLOAD_COMPRESSION != "none" else None
 )
-"""Data converter using Pydantic JSON conversion."""
+"""Data converter using Pydantic JSON conversion, compressing large payloads."""
@@ -0,0 +1,32 @@
+import time
+from typing import Any
+
+from temporalio import activity
+from temporalio.worker import ActivityInboundInterceptor, ExecuteActivityInput, Interceptor
+
+from core.activity_options import get_activity_options
+from core.metrics import metrics
+
+
+class MetricsInterceptor(Interceptor):
+    def intercept_activity(self, next: ActivityInboundInterceptor) -> ActivityInboundInterceptor:
+        return _ActivityMetricsInterceptor(next)
+
+
+class _ActivityMetricsInterceptor(ActivityInboundInterceptor):
+    async def execute_activity(self, input: ExecuteActivityInput) -> Any:
+        info = activity.info()
+        labels = dict(activity=info.activity_type, profile=get_activity_options(info.activity_type).profile)
+
+        metrics.increment("activity_attempts_total", **labels)
+        if info.attempt > 1:
+            metrics.increment("activity_retries_total", **labels)
+
+        started_at = time.monotonic()
+        try:
+            return await super().execute_activity(input)
+        except BaseException:
+            metrics.increment("activity_failures_total", **labels)
+            raise
+        finally:
+            metrics.observe("activity_execution_seconds", time.monotonic() - started_at, **labels)
@@ -0,0 +1,71 @@
+import asyncio
+from collections import defaultdict
+
+Labels = tuple[tuple[str, str], ...]
+
+
+class Metrics:
+    """Process wide counters, gauges and latency summaries.
+
+    Rendered in the Prometheus text format, and served over HTTP by the worker
+    when ``METRICS_PORT`` is set.
+    """
+
+    def __init__(self):
+        self._counters: dict[str, dict[Labels, float]] = defaultdict(lambda: defaultdict(float))
+        self._gauges: dict[str, dict[Labels, float]] = defaultdict(dict)
+        self._summaries: dict[str, dict[Labels, list[float]]] = defaultdict(lambda: defaultdict(lambda: [0, 0.0]))
+
+    def increment(self, name: str, value: float = 1, **labels: str) -> None:
+        self._counters[name][_labels(labels)] += value
+
+    def set(self, name: str, value: float, **labels: str) -> None:
+        self._gauges[name][_labels(labels)] = value
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        summary = self._summaries[name][_labels(labels)]
+        summary[0] += 1
+        summary[1] += value
+
+    def render(self) -> str:
+        lines = []
+        for name, series in self._counters.items():
+            lines.append(f"# TYPE {name} counter")
+            lines.extend(f"{name}{_format(labels)} {value}" for labels, value in series.items())
+
+        for name, series in self._gauges.items():
+            lines.append(f"# TYPE {name} gauge")
+            lines.extend(f"{name}{_format(labels)} {value}" for labels, value in series.items())
+
+        for name, series in self._summaries.items():
+            lines.append(f"# TYPE {name} summary")
+            for labels, (count, total) in series.items():
+                lines.append(f"{name}_count{_format(labels)} {count}")
+                lines.append(f"{name}_sum{_format(labels)} {total}")
+
+        return "\n".join(lines) + "\n"
+
+    async def serve(self, port: int) -> asyncio.Server:
+        async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+            await reader.readline()
+            body = self.render().encode()
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/plain; version=0.0.4\r\n"
+                         b"Content-Length: %d\r\nConnection: close\r\n\r\n%s" % (len(body), body))
+            await writer.drain()
+            writer.close()
+
+        print(f"Serving metrics on port {port}")
+        return await asyncio.start_server(handle, port=port)
+
+
+def _labels(labels: dict[str, str]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
+
+
+metrics = Metrics()
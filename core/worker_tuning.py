@@ -0,0 +1,71 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from pydantic import BaseModel
+
+
+class WorkerTuning(BaseModel):
+    """Concurrency limits of a worker, defaults are the Temporal ones.
+
+    ``WORKER_PROFILE`` picks a preset other than the one the worker is built
+    with, and every field can be overridden on its own with
+    ``WORKER_<FIELD>``, e.g. ``WORKER_MAX_CONCURRENT_ACTIVITIES=300``.
+    ``activity_executor_workers`` sizes the thread pool running
+    non-async activities, 0 runs none.
+    """
+    profile: str = "default"
+    max_concurrent_activities: int = 100
+    max_concurrent_local_activities: int = 100
+    max_concurrent_workflow_tasks: int = 100
+    max_cached_workflows: int = 1000
+    max_concurrent_workflow_task_polls: int = 5
+    max_concurrent_activity_task_polls: int = 5
+    activity_executor_workers: int = 0
+
+    def worker_options(self) -> dict[str, Any]:
+        options = self.model_dump(exclude={"profile", "activity_executor_workers"})
+        if self.activity_executor_workers:
+            options["activity_executor"] = ThreadPoolExecutor(max_workers=self.activity_executor_workers)
+        return options
+
+
+DEFAULT_WORKER_TUNING = WorkerTuning()
+
+# Collect activities mostly wait on the upstream API and its rate limit, so many run at once
+IO_HEAVY_COLLECTOR = WorkerTuning(
+    profile="io-heavy-collector",
+    max_concurrent_activities=200,
+    max_concurrent_local_activities=20,
+    max_concurrent_workflow_tasks=50,
+    max_cached_workflows=500,
+    max_concurrent_workflow_task_polls=2,
+    max_concurrent_activity_task_polls=10,
+)
+
+# One long running workflow per platform shard and short local activities
+LIGHT_ORCHESTRATOR = WorkerTuning(
+    profile="light-orchestrator",
+    max_concurrent_activities=20,
+    max_concurrent_local_activities=50,
+    max_concurrent_workflow_tasks=20,
+    max_cached_workflows=100,
+    max_concurrent_workflow_task_polls=2,
+    max_concurrent_activity_task_polls=1,
+)
+
+WORKER_PROFILES = {tuning.profile: tuning for tuning in (DEFAULT_WORKER_TUNING, IO_HEAVY_COLLECTOR, LIGHT_ORCHESTRATOR)}
+
+
+def load_worker_tuning(default: WorkerTuning = DEFAULT_WORKER_TUNING) -> WorkerTuning:
+    profile = os.getenv("WORKER_PROFILE")
+    if profile and profile not in WORKER_PROFILES:
+        raise ValueError(f"Unknown worker profile {profile}, expected one of {sorted(WORKER_PROFILES)}")
+
+    tuning = WORKER_PROFILES[profile] if profile else default
+    overrides = {
+        field: int(value)
+        for field in WorkerTuning.model_fields if field != "profile"
+        if (value := os.getenv(f"WORKER_{field.upper()}")) is not None
+    }
+    return tuning.model_copy(update=overrides) if overrides else tuning
@@ -13,6 +13,10 @@ class WorkflowDefinition(BaseModel, ABC):
     def name(cls) -> str:
         return cls.__name__.lower().replace('Definition', '')
 
+    @classmethod
+    def task_queue(cls, request: BaseModel | None = None) -> str:
+        return cls.queue
+
     @classmethod
     def generate_workflow_id(cls, *args, **kwargs) -> str:
         return f'{cls.name()}-{cls._workflow_identifiers(*args, **kwargs)}'
@@ -0,0 +1,88 @@
+from datetime import datetime
+from typing import Any
+
+from pydantic import BaseModel
+
+from libs.data_types.platform import Platform
+from libs.schema.amount import Amount
+from libs.schema.raw_transaction import RawTransaction, raw_transactions_query
+
+
+class AccountFlows(BaseModel):
+    account: str
+    num_of_tx: int
+    inflow: Amount
+    outflow: Amount
+    balance: Amount
+    first_timestamp: datetime
+    last_timestamp: datetime
+
+
+class DailyVolume(BaseModel):
+    account: str
+    day: datetime
+    num_of_tx: int
+    volume: Amount
+
+
+async def account_flows(platform: Platform,
+                        accounts: list[str] | None = None,
+                        since: datetime | None = None,
+                        until: datetime | None = None,
+                        match: dict[str, Any] | None = None) -> list[AccountFlows]:
+    """Inflow, outflow and balance of every account, in a single pass of Mongo over the transactions.
+
+    A transaction flows into the account when it is sent to it and out of it
+    when the account sends it, sums are exact Decimal128 sums. ``match``
+    further filters the transactions.
+    """
+    amount = {"$toDecimal": "$amount"}
+    pipeline = [
+        {"$match": {**raw_transactions_query(platform, accounts, since, until), **(match or {})}},
+        {"$group": {
+            "_id": "$metadata.account",
+            "num_of_tx": {"$sum": 1},
+            "inflow": {"$sum": {"$cond": [{"$eq": ["$to_address", "$metadata.account"]}, amount, 0]}},
+            "outflow": {"$sum": {"$cond": [{"$eq": ["$from_address", "$metadata.account"]}, amount, 0]}},
+            "first_timestamp": {"$min": "$metadata.timestamp"},
+            "last_timestamp": {"$max": "$metadata.timestamp"},
+        }},
+        {"$project": {
+            "_id": 0,
+            "account": "$_id",
+            "num_of_tx": 1,
+            "inflow": {"$toDecimal": "$inflow"},
+            "outflow": {"$toDecimal": "$outflow"},
+            "balance": {"$toDecimal": {"$subtract": ["$inflow", "$outflow"]}},
+            "first_timestamp": 1,
+            "last_timestamp": 1,
+        }},
+        {"$sort": {"account": 1}},
+    ]
+    return [AccountFlows.model_validate(row) for row in await _aggregate(pipeline)]
+
+
+async def daily_volume(platform: Platform,
+                       accounts: list[str] | None = None,
+                       since: datetime | None = None,
+                       until: datetime | None = None) -> list[DailyVolume]:
+    """Volume and number of transactions of every account per UTC day."""
+    pipeline = [
+        {"$match": raw_transactions_query(platform, accounts, since, until)},
+        {"$group": {
+            "_id": {
+                "account": "$metadata.account",
+                "day": {"$dateTrunc": {"date": "$metadata.timestamp", "unit": "day"}},
+            },
+            "num_of_tx": {"$sum": 1},
+            "volume": {"$sum": {"$toDecimal": "$amount"}},
+        }},
+        {"$project": {"_id": 0, "account": "$_id.account", "day": "$_id.day", "num_of_tx": 1, "volume": 1}},
+        {"$sort": {"account": 1, "day": 1}},
+    ]
+    return [DailyVolume.model_validate(row) for row in await _aggregate(pipeline)]
+
+
+async def _aggregate(pipeline: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    # Large platforms don't fit the 100MB in-memory limit of $group
+    return await RawTransaction.get_motor_collection().aggregate(pipeline, allowDiskUse=True).to_list(None)
@@ -0,0 +1,124 @@
+import asyncio
+import os
+import time
+from abc import ABC, abstractmethod
+from typing import Callable
+
+from pydantic import BaseModel
+from pymongo import ReturnDocument
+
+from libs.data_types.platform import Platform
+from libs.schema.rate_limit_bucket import RateLimitBucket
+
+RATE_LIMITER_BACKEND = os.getenv("RATE_LIMITER_BACKEND", "mongo")
+
+
+class RateLimit(BaseModel):
+    rate: float  # sustained upstream requests per second
+    burst: float  # requests that can be made at once after being idle
+
+
+RATE_LIMITS = {
+    Platform.ETHEREUM: RateLimit(rate=5, burst=5),
+    Platform.BINANCE: RateLimit(rate=10, burst=20),
+}
+
+
+class TokenBucket(ABC):
+    def __init__(self, platform: Platform, api_key: str, limit: RateLimit):
+        self.platform = platform
+        self.api_key = api_key
+        self.limit = limit
+
+    @abstractmethod
+    async def try_acquire(self, tokens: float) -> float:
+        """Take ``tokens`` from the bucket.
+
+        Returns 0 when the tokens were taken, otherwise the number of seconds
+        to wait before the bucket is expected to hold enough tokens.
+        """
+        raise NotImplementedError
+
+    def _time_to_refill(self, available: float, tokens: float) -> float:
+        return (tokens - available) / self.limit.rate
+
+
+class LocalTokenBucket(TokenBucket):
+    """In-process bucket, for tests and single worker deployments."""
+
+    def __init__(self, platform: Platform, api_key: str, limit: RateLimit):
+        super().__init__(platform, api_key, limit)
+        self._tokens = limit.burst
+        self._updated_at = time.monotonic()
+
+    async def try_acquire(self, tokens: float) -> float:
+        now = time.monotonic()
+        self._tokens = min(self.limit.burst, self._tokens + (now - self._updated_at) * self.limit.rate)
+        self._updated_at = now
+
+        if self._tokens < tokens:
+            return self._time_to_refill(self._tokens, tokens)
+
+        self._tokens -= tokens
+        return 0
+
+
+class MongoTokenBucket(TokenBucket):
+    """Bucket shared by every collector process using the same API key.
+
+    Refill and take happen in a single findAndModify pipeline evaluated
+    against the server clock, so concurrent workers never oversubscribe a key.
+    """
+
+    async def try_acquire(self, tokens: float) -> float:
+        elapsed_seconds = {'$divide': [{'$subtract': ['$$NOW', {'$ifNull': ['$updated_at', '$$NOW']}]}, 1000]}
+        refilled = {'$add': [{'$ifNull': ['$tokens', self.limit.burst]},
+                             {'$multiply': [elapsed_seconds, self.limit.rate]}]}
+
+        bucket = await RateLimitBucket.get_motor_collection().find_one_and_update(
+            {'platform': self.platform, 'api_key': self.api_key},
+            [
+                {'$set': {'tokens': {'$min': [self.limit.burst, refilled]}, 'updated_at': '$$NOW'}},
+                {'$set': {'granted': {'$gte': ['$tokens', tokens]}}},
+                {'$set': {'tokens': {'$cond': ['$granted', {'$subtract': ['$tokens', tokens]}, '$tokens']}}},
+            ],
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+
+        if bucket['granted']:
+            return 0
+
+        return self._time_to_refill(bucket['tokens'], tokens)
+
+
+class RateLimiter:
+    """Token bucket rate limiting of upstream requests per platform and API key."""
+
+    def __init__(self, backend: str = RATE_LIMITER_BACKEND, limits: dict[Platform, RateLimit] | None = None):
+        self.backend = backend
+        self.limits = limits or RATE_LIMITS
+        self._buckets: dict[tuple[Platform, str], TokenBucket] = {}
+
+    async def acquire(self,
+                      platform: Platform,
+                      api_key: str,
+                      tokens: float = 1,
+                      on_wait: Callable[[], None] | None = None) -> None:
+        """Wait until ``tokens`` are granted, ``on_wait`` is called before every wait, e.g. to heartbeat."""
+        bucket = self._bucket(platform, api_key)
+
+        while wait := await bucket.try_acquire(tokens):
+            if on_wait is not None:
+                on_wait()
+            await asyncio.sleep(wait)
+
+    def _bucket(self, platform: Platform, api_key: str) -> TokenBucket:
+        key = (platform, api_key)
+        if key not in self._buckets:
+            bucket_class = MongoTokenBucket if self.backend == "mongo" else LocalTokenBucket
+            self._buckets[key] = bucket_class(platform, api_key, self.limits[platform])
+        return self._buckets[key]
+
+
+rate_limiter = RateLimiter()
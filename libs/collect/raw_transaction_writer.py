@@ -0,0 +1,193 @@
+import hashlib
+import time
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal, localcontext
+
+from beanie.odm.operators.update.general import Set
+from beanie.odm.utils.dump import get_dict
+from bson import Decimal128
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from libs.data_types.platform import Platform
+from libs.schema.account_summary import AccountSummary, counterparty_register, MAX_APPLIED_BATCHES
+from libs.schema.collect_status import CollectStatus
+from libs.schema.raw_transaction import RawTransaction
+
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_FLUSH_INTERVAL_SECONDS = 5.0
+
+
+class RawTransactionWriter:
+    """Buffers the raw transactions of a single account and writes them in batches.
+
+    Every batch is a single unordered bulk of upserts keyed by the transaction
+    key, so replaying a page (activity retry, overlapping slots) overwrites the
+    same documents instead of duplicating them. The ``CollectStatus.last_synced_at`` cursor is moved forward only after a
+    batch has been acknowledged by Mongo, so a crash between batches never
+    skips transactions that were not written.
+
+    The transactions a batch inserted, never the replayed ones, are then added
+    to the account's ``AccountSummary``. They are inserted with an empty
+    ``summary_batch``, claimed under a batch id before being summed, and the
+    summary records the ids it applied, so a flush interrupted anywhere is
+    completed by the next one without counting a transaction twice.
+    """
+
+    def __init__(self,
+                 platform: Platform,
+                 account: str,
+                 batch_size: int = DEFAULT_BATCH_SIZE,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL_SECONDS):
+        self.platform = platform
+        self.account = account
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.num_of_written = 0
+        self.last_synced_at: datetime | None = None
+        self._buffer: list[RawTransaction] = []
+        self._last_flush = time.monotonic()
+
+    async def __aenter__(self) -> "RawTransactionWriter":
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        # Never commit the cursor for a page that failed half way
+        if exc_type is None:
+            await self.flush()
+
+    async def add(self, raw_tx: RawTransaction) -> None:
+        self._buffer.append(raw_tx)
+
+        if len(self._buffer) >= self.batch_size or self._is_flush_due():
+            await self.flush()
+
+    async def flush(self) -> None:
+        if not self._buffer:
+            return
+
+        batch, self._buffer = self._buffer, []
+        started_at = time.monotonic()
+
+        result = await RawTransaction.get_motor_collection().bulk_write(
+            [_upsert(raw_tx) for raw_tx in batch], ordered=False
+        )
+
+        latency_ms = (time.monotonic() - started_at) * 1000
+        self._last_flush = time.monotonic()
+        self.num_of_written += len(batch)
+        print(f"{self.platform}-{self.account} - Wrote batch of {len(batch)} transactions in {latency_ms:.1f}ms "
+              f"({result.upserted_count} new, {result.matched_count} replayed)")
+
+        await self._update_summary()
+        await self._commit_cursor(max(raw_tx.metadata.timestamp for raw_tx in batch))
+
+    def _is_flush_due(self) -> bool:
+        return time.monotonic() - self._last_flush >= self.flush_interval
+
+    async def _update_summary(self) -> None:
+        collection = RawTransaction.get_motor_collection()
+        account_query = {'metadata.platform': self.platform, 'metadata.account': self.account}
+        docs = await collection.find({**account_query, 'summary_batch': {'$exists': True}}).to_list(None)
+        if not docs:
+            return
+
+        unclaimed_ids = sorted(doc['_id'] for doc in docs if not doc['summary_batch'])
+        if unclaimed_ids:
+            batch_id = hashlib.sha1(''.join(str(_id) for _id in unclaimed_ids).encode()).hexdigest()
+            await collection.update_many({'_id': {'$in': unclaimed_ids}, 'summary_batch': ''},
+                                         {'$set': {'summary_batch': batch_id}})
+            for doc in docs:
+                doc['summary_batch'] = doc['summary_batch'] or batch_id
+
+        # Batches left claimed by an interrupted flush are completed first, the summary skips the ones it applied
+        batches: dict[str, list[RawTransaction]] = defaultdict(list)
+        for doc in docs:
+            batches[doc['summary_batch']].append(RawTransaction.model_validate(doc))
+
+        for batch_id, transactions in batches.items():
+            await self._apply_summary_batch(batch_id, transactions)
+            await collection.update_many({**account_query, 'summary_batch': batch_id},
+                                         {'$unset': {'summary_batch': ''}})
+
+    async def _apply_summary_batch(self, batch_id: str, transactions: list[RawTransaction]) -> None:
+        update = _summary_update(self.account, transactions)
+        update['$push'] = {'applied_batches': {'$each': [batch_id], '$slice': -MAX_APPLIED_BATCHES}}
+        try:
+            await AccountSummary.get_motor_collection().update_one(
+                {'account': self.account, 'platform': self.platform, 'applied_batches': {'$ne': batch_id}},
+                update,
+                upsert=True
+            )
+        except DuplicateKeyError:
+            # The summary exists and already has the batch, the upsert tried to insert a second one
+            print(f"{self.platform}-{self.account} - Summary batch {batch_id} already applied")
+
+    async def _commit_cursor(self, synced_at: datetime) -> None:
+        if self.last_synced_at is not None and synced_at <= self.last_synced_at:
+            return
+
+        self.last_synced_at = synced_at
+        await CollectStatus.find_one(
+            CollectStatus.account == self.account,
+            CollectStatus.platform == self.platform
+        ).upsert(
+            Set({CollectStatus.last_synced_at: synced_at}),
+            on_insert=CollectStatus(
+                account=self.account,
+                platform=self.platform,
+                last_synced_at=synced_at
+            )
+        )
+
+
+def _upsert(raw_tx: RawTransaction) -> UpdateOne:
+    return UpdateOne(
+        {
+            'metadata.platform': raw_tx.metadata.platform,
+            'metadata.account': raw_tx.metadata.account,
+            'key': raw_tx.key
+        },
+        {
+            '$set': get_dict(raw_tx, to_db=True),
+            # Only an inserted transaction is waiting to be summarized, a replayed one keeps its state
+            '$setOnInsert': {'summary_batch': ''}
+        },
+        upsert=True
+    )
+
+
+def _summary_update(account: str, transactions: list[RawTransaction]) -> dict:
+    total_in, total_out = Decimal(0), Decimal(0)
+    registers: dict[str, int] = {}
+
+    # Decimal128 precision, wei amounts overflow the default 28 digits
+    with localcontext() as context:
+        context.prec = 34
+        for raw_tx in transactions:
+            if raw_tx.to_address == account:
+                total_in += raw_tx.amount
+                counterparty = raw_tx.from_address
+            elif raw_tx.from_address == account:
+                total_out += raw_tx.amount
+                counterparty = raw_tx.to_address
+            else:
+                continue
+
+            register, value = counterparty_register(counterparty)
+            registers[register] = max(registers.get(register, 0), value)
+
+    timestamps = [raw_tx.metadata.timestamp for raw_tx in transactions]
+    return {
+        '$inc': {
+            'num_of_tx': len(transactions),
+            'total_in': Decimal128(total_in),
+            'total_out': Decimal128(total_out),
+        },
+        '$min': {'first_timestamp': min(timestamps)},
+        '$max': {
+            'last_timestamp': max(timestamps),
+            **{f'counterparty_registers.{register}': value for register, value in registers.items()}
+        },
+    }
@@ -0,0 +1,50 @@
+from datetime import datetime, timedelta
+from random import randint
+from typing import AsyncIterator, Callable
+
+from pydantic import BaseModel
+
+from libs.collect.rate_limiter import rate_limiter
+from libs.data_types.platform import Platform
+from libs.schema.raw_transaction import RawTransaction, Metadata
+
+
+class Page(BaseModel):
+    transactions: list[RawTransaction]
+    cursor: datetime
+    has_more: bool
+
+
+async def fetch_pages(platform: Platform,
+                      account: str,
+                      api_key: str,
+                      since: datetime,
+                      max_pages: int,
+                      on_wait: Callable[[], None] | None = None) -> AsyncIterator[Page]:
+    """Pull an account's transactions page by page, oldest first, starting after ``since``.
+
+    Every page costs one upstream request and is rate limited on ``api_key``,
+    ``on_wait`` is called whenever the rate limit holds a request back.
+    The upstream is simulated with random transactions for now.
+    """
+    cursor = since
+    for _ in range(max_pages):
+        await rate_limiter.acquire(platform, api_key, on_wait=on_wait)
+
+        transactions = []
+        for i in range(randint(1, 5)):
+            cursor = cursor + timedelta(days=randint(0, 10))
+            metadata = Metadata(account=account, timestamp=cursor, platform=platform)
+            random_from_address = str(randint(1, 1000000000000))
+            random_to_address = str(randint(1, 1000000000000))
+            random_amount = randint(1, 1000000000000)
+            transactions.append(RawTransaction(from_address=random_from_address,
+                                               to_address=random_to_address,
+                                               amount=random_amount,
+                                               metadata=metadata))
+
+        has_more = randint(1, 100) <= 99
+        yield Page(transactions=transactions, cursor=cursor, has_more=has_more)
+
+        if not has_more:
+            return
@@ -0,0 +1,7 @@
+from enum import StrEnum
+
+
+class PriorityTier(StrEnum):
+    STANDARD = 'standard'
+    PRO = 'pro'
+    ENTERPRISE = 'enterprise'
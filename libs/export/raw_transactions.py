@@ -0,0 +1,92 @@
+import asyncio
+from datetime import datetime
+from pathlib import Path
+from typing import Any, AsyncIterator
+
+import pydantic_core
+from bson import Decimal128
+
+from libs.data_types.platform import Platform
+from libs.schema.raw_transaction import RawTransaction, raw_transactions_query
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+DEFAULT_BATCH_SIZE = 10_000
+DEFAULT_FIELDS = (
+    "metadata.platform",
+    "metadata.account",
+    "metadata.timestamp",
+    "from_address",
+    "to_address",
+    "amount",
+    "tx_hash",
+    "log_index",
+)
+
+
+async def iter_batches(platform: Platform,
+                       account: str | None = None,
+                       since: datetime | None = None,
+                       until: datetime | None = None,
+                       fields: tuple[str, ...] = DEFAULT_FIELDS,
+                       batch_size: int = DEFAULT_BATCH_SIZE) -> AsyncIterator[list[dict[str, Any]]]:
+    """Stream the raw transactions of a platform, or of one of its accounts, oldest first.
+
+    Documents are read as projected raw dicts, ``batch_size`` at a time and
+    never as models, with ``since`` inclusive and ``until`` exclusive.
+    """
+    cursor = RawTransaction.get_motor_collection().find(
+        raw_transactions_query(platform, [account] if account is not None else None, since, until),
+        projection={"_id": 0, **{field: 1 for field in fields}},
+        sort=[("metadata.timestamp", 1)],
+        batch_size=batch_size,
+    )
+    while batch := await cursor.to_list(length=batch_size):
+        yield [{field: _get(document, field) for field in fields} for document in batch]
+
+
+async def iter_columns(platform: Platform, **kwargs) -> AsyncIterator[dict[str, "numpy.ndarray"]]:
+    if numpy is None:
+        raise ImportError("numpy is required for columnar output")
+
+    fields = kwargs.get("fields", DEFAULT_FIELDS)
+    async for batch in iter_batches(platform, **kwargs):
+        yield {field: numpy.array([row[field] for row in batch]) for field in fields}
+
+
+async def iter_record_batches(platform: Platform, **kwargs) -> AsyncIterator["pyarrow.RecordBatch"]:
+    if pyarrow is None:
+        raise ImportError("pyarrow is required for Arrow output")
+
+    fields = kwargs.get("fields", DEFAULT_FIELDS)
+    async for batch in iter_batches(platform, **kwargs):
+        yield pyarrow.RecordBatch.from_pydict({field: [row[field] for row in batch] for field in fields})
+
+
+async def write_ndjson(path: str | Path, platform: Platform, **kwargs) -> int:
+    """Write the raw transactions to a newline delimited JSON file and return how many were written."""
+    num_of_rows = 0
+    with open(path, "wb") as file:
+        async for batch in iter_batches(platform, **kwargs):
+            lines = b"".join(pydantic_core.to_json(row) + b"\n" for row in batch)
+            await asyncio.to_thread(file.write, lines)
+            num_of_rows += len(batch)
+
+    return num_of_rows
+
+
+def _get(document: dict[str, Any], field: str) -> Any:
+    for part in field.split("."):
+        if document is None:
+            return None
+        document = document.get(part)
+    # Amounts are exact decimals, which both Arrow and JSON keep as is
+    return document.to_decimal() if isinstance(document, Decimal128) else document
@@ -0,0 +1,24 @@
+from datetime import timedelta
+
+MIN_COOLDOWN = timedelta(minutes=5)
+BASE_COOLDOWN = timedelta(hours=2)
+MAX_COOLDOWN = timedelta(days=7)
+TARGET_TX_PER_COLLECT = 50
+
+
+def next_cooldown(num_of_tx: int, empty_streak: int, tx_rate: float) -> timedelta:
+    """How long a caught-up account rests before it is eligible again.
+
+    ``empty_streak`` counts the consecutive empty collects, this one included.
+    Accounts that keep coming back empty back off exponentially from
+    ``BASE_COOLDOWN`` up to ``MAX_COOLDOWN``. Busy accounts come back once
+    they are expected to have ``TARGET_TX_PER_COLLECT`` new transactions,
+    but never sooner than ``MIN_COOLDOWN``.
+    """
+    if num_of_tx == 0:
+        return min(BASE_COOLDOWN * 2 ** max(empty_streak - 1, 0), MAX_COOLDOWN)
+
+    if tx_rate <= 0:
+        return BASE_COOLDOWN
+
+    return min(max(timedelta(hours=TARGET_TX_PER_COLLECT / tx_rate), MIN_COOLDOWN), BASE_COOLDOWN)
@@ -0,0 +1,101 @@
+import math
+from abc import ABC, abstractmethod
+from datetime import datetime
+from enum import StrEnum
+
+from pydantic import BaseModel
+
+from libs.data_types.platform import Platform
+from libs.data_types.priority_tier import PriorityTier
+
+TX_RATE_MEMORY_HOURS = 6
+MIN_RATE_WINDOW_HOURS = 1 / 60
+
+
+class AccountStats(BaseModel):
+    account: str
+    platform: Platform
+    last_synced_at: datetime
+    last_collected_at: datetime
+    tx_rate: float = 0.0  # observed transactions per hour
+    priority_tier: PriorityTier = PriorityTier.STANDARD
+
+
+class CandidateOrder(StrEnum):
+    """An order candidates are fetched in, as a sort spec of the ``CollectStatus`` field."""
+    OLDEST_CURSOR = "+last_synced_at"
+    BUSIEST = "-tx_rate"
+
+    def key(self, status) -> datetime | float:
+        """Sort key of anything carrying ``last_synced_at`` and ``tx_rate``, smallest first."""
+        return status.last_synced_at if self == CandidateOrder.OLDEST_CURSOR else -status.tx_rate
+
+
+class SchedulingPolicy(ABC):
+    """Scores accounts, the highest scores are collected first.
+
+    Candidates are fetched per priority tier, ``candidate_factor`` per pick in
+    every one of ``candidate_orders``, so every tier has candidates to share
+    the picks with and the policy sees the accounts it would score highest.
+    """
+    name: str
+    candidate_factor: int = 1
+    candidate_orders: tuple[CandidateOrder, ...] = (CandidateOrder.OLDEST_CURSOR,)
+
+    @abstractmethod
+    def score(self, stats: AccountStats, now: datetime) -> float:
+        raise NotImplementedError
+
+
+class OldestFirstPolicy(SchedulingPolicy):
+    """The historical behaviour, the account with the oldest cursor goes first."""
+    name = "oldest-first"
+
+    def score(self, stats: AccountStats, now: datetime) -> float:
+        return (now - stats.last_synced_at).total_seconds()
+
+
+class ExpectedYieldPolicy(SchedulingPolicy):
+    """Maximises fresh transactions per API call.
+
+    The expected backlog of an account is its observed rate times the age of
+    its cursor, capped at what one call can return, so an account that did
+    not catch up on its last call stays on top. Every account is assumed to
+    produce at least ``exploration_rate`` since it was last collected, so
+    dormant wallets are still revisited eventually. The busiest accounts are
+    fetched next to the stalest ones, their cursor may be recent.
+    """
+    name = "expected-yield"
+    candidate_factor = 2
+    candidate_orders = (CandidateOrder.OLDEST_CURSOR, CandidateOrder.BUSIEST)
+
+    def __init__(self, page_size: int = 100, exploration_rate: float = 0.1):
+        self.page_size = page_size
+        self.exploration_rate = exploration_rate
+
+    def score(self, stats: AccountStats, now: datetime) -> float:
+        cursor_age_hours = (now - stats.last_synced_at).total_seconds() / 3600
+        staleness_hours = (now - stats.last_collected_at).total_seconds() / 3600
+        expected_tx = stats.tx_rate * cursor_age_hours + self.exploration_rate * staleness_hours
+        return min(expected_tx, self.page_size)
+
+
+POLICIES: dict[str, type[SchedulingPolicy]] = {
+    OldestFirstPolicy.name: OldestFirstPolicy,
+    ExpectedYieldPolicy.name: ExpectedYieldPolicy,
+}
+
+
+def get_policy(name: str) -> SchedulingPolicy:
+    return POLICIES[name]()
+
+
+def update_tx_rate(tx_rate: float, num_of_tx: int, elapsed_hours: float) -> float:
+    """Transactions per hour after collecting ``num_of_tx`` that piled up in ``elapsed_hours``.
+
+    A continuous time moving average, a sample weighs by how long it was
+    observed so frequent short collections don't make the estimate noisy.
+    """
+    elapsed_hours = max(elapsed_hours, MIN_RATE_WINDOW_HOURS)
+    weight = 1 - math.exp(-elapsed_hours / TX_RATE_MEMORY_HOURS)
+    return weight * num_of_tx / elapsed_hours + (1 - weight) * tx_rate
@@ -0,0 +1,72 @@
+import heapq
+from datetime import datetime
+from typing import Callable, Hashable, Iterable
+
+from libs.data_types.priority_tier import PriorityTier
+from libs.scheduling.policies import AccountStats, CandidateOrder, SchedulingPolicy
+
+TIER_WEIGHTS = {
+    PriorityTier.STANDARD: 1.0,
+    PriorityTier.PRO: 2.0,
+    PriorityTier.ENTERPRISE: 4.0,
+}
+
+
+def by_tier(stats: AccountStats) -> Hashable:
+    return stats.priority_tier
+
+
+def candidate_pool(eligible: Iterable[AccountStats],
+                   k: int,
+                   orders: tuple[CandidateOrder, ...]) -> list[AccountStats]:
+    """The first ``k`` eligible accounts of every tier in every one of ``orders``.
+
+    The candidates prepare_collect fetches from Mongo or the status cache,
+    in memory for replays.
+    """
+    tiers: dict[PriorityTier, list[AccountStats]] = {}
+    for stats in eligible:
+        tiers.setdefault(stats.priority_tier, []).append(stats)
+
+    pool: dict[str, AccountStats] = {}
+    for tier_accounts in tiers.values():
+        for order in orders:
+            for stats in heapq.nsmallest(k, tier_accounts, key=order.key):
+                pool.setdefault(stats.account, stats)
+    return list(pool.values())
+
+
+def select_accounts(candidates: list[AccountStats],
+                    k: int,
+                    policy: SchedulingPolicy,
+                    now: datetime,
+                    flow: Callable[[AccountStats], Hashable] = by_tier,
+                    weights: dict[Hashable, float] | None = None) -> list[AccountStats]:
+    """Pick ``k`` accounts with weighted fair queueing between flows.
+
+    Every flow (by default a priority tier) gets a share of the picks
+    proportional to its weight, and within a flow accounts are taken in
+    ``policy`` score order, so a busy tier can't starve the others.
+    """
+    weights = weights or TIER_WEIGHTS
+
+    queues: dict[Hashable, list[tuple[float, int, AccountStats]]] = {}
+    for i, stats in enumerate(candidates):
+        queues.setdefault(flow(stats), []).append((-policy.score(stats, now), i, stats))
+    for queue in queues.values():
+        heapq.heapify(queue)
+
+    # Virtual finish time of the next pick of every flow, the smallest one is served first
+    finish_times = [(1 / weights.get(key, 1.0), i, key) for i, key in enumerate(queues)]
+    heapq.heapify(finish_times)
+
+    selected = []
+    while finish_times and len(selected) < k:
+        finish_time, i, key = heapq.heappop(finish_times)
+        _, _, stats = heapq.heappop(queues[key])
+        selected.append(stats)
+
+        if queues[key]:
+            heapq.heappush(finish_times, (finish_time + 1 / weights.get(key, 1.0), i, key))
+
+    return selected
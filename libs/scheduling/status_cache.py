@@ -0,0 +1,213 @@
+import asyncio
+import heapq
+import os
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from libs.data_types.platform import Platform
+from libs.data_types.priority_tier import PriorityTier
+from libs.schema.collect_status import CollectStatus
+from libs.scheduling.policies import AccountStats, CandidateOrder
+
+COLLECT_STATUS_CACHE_SIZE = int(os.getenv("COLLECT_STATUS_CACHE_SIZE", 100_000))
+FULL_RELOAD_INTERVAL = timedelta(minutes=10)
+# Covers clock skew between the collectors writing hold_until and the orchestrator reading it
+DELTA_MARGIN = timedelta(minutes=1)
+
+
+@dataclass(slots=True)
+class CachedStatus:
+    account: str
+    last_synced_at: datetime
+    hold_until: datetime
+    last_collected_at: datetime
+    tx_rate: float
+    priority_tier: PriorityTier
+    version: int
+
+    def stats(self, platform: Platform) -> AccountStats:
+        return AccountStats(account=self.account, platform=platform, last_synced_at=self.last_synced_at,
+                            last_collected_at=self.last_collected_at, tx_rate=self.tx_rate,
+                            priority_tier=self.priority_tier)
+
+
+class CollectStatusCache:
+    """In-process copy of the collect statuses of a platform shard, stalest first.
+
+    Eligible accounts sit in a heap per priority tier and candidate order and
+    accounts on hold in a heap ordered by ``hold_until``, so picking
+    candidates costs O(k log n). The heaps are lazy: an updated account is
+    pushed again with a new version and its outdated entries are skipped when
+    they surface.
+
+    Every collect ends by moving ``hold_until`` to now or later, so a refresh
+    only reads the statuses whose ``hold_until`` moved since the previous
+    one. A full reload every ``FULL_RELOAD_INTERVAL`` picks up statuses
+    changed any other way, it runs in the background once the cache has
+    been loaded. It skips the accounts held past the next reload, so dormant
+    accounts backing off for days don't crowd out the eligible ones. At most
+    ``max_entries`` accounts are kept, the ones held the longest are evicted
+    first and then the ones with the most recent cursors.
+    """
+
+    def __init__(self,
+                 platform: Platform,
+                 shard_key_range: tuple[int, int] | None = None,
+                 max_entries: int = COLLECT_STATUS_CACHE_SIZE):
+        self.platform = platform
+        self.shard_key_range = shard_key_range
+        self.max_entries = max_entries
+        self._entries: dict[str, CachedStatus] = {}
+        self._eligible: dict[tuple[PriorityTier, CandidateOrder], list[tuple[datetime | float, int, str]]] = {}
+        self._on_hold: list[tuple[datetime, int, str]] = []
+        self._version = 0
+        self._refreshed_at: datetime | None = None
+        self._reloaded_at: datetime | None = None
+        self._lock = asyncio.Lock()
+        self._reload_task: asyncio.Task | None = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def refresh(self, now: datetime) -> None:
+        async with self._lock:
+            if self._reload_task is None and (self._reloaded_at is None
+                                              or now - self._reloaded_at >= FULL_RELOAD_INTERVAL):
+                self._reload_task = asyncio.create_task(self._reload(now))
+                self._reload_task.add_done_callback(self._reload_done)
+
+            if self._reloaded_at is None:
+                # Nothing to answer from yet. Shielded, so an activity timing out doesn't throw the load away
+                await asyncio.shield(self._reload_task)
+                return
+
+            await self._load_delta(now)
+
+    def candidates(self,
+                   k: int,
+                   now: datetime,
+                   exclude: set[str],
+                   orders: tuple[CandidateOrder, ...] = (CandidateOrder.OLDEST_CURSOR,)) -> list[AccountStats]:
+        """The first ``k`` accounts of every tier in every one of ``orders`` that are not on hold or excluded."""
+        while self._on_hold and self._on_hold[0][0] <= now:
+            _, version, account = heapq.heappop(self._on_hold)
+            if (entry := self._current(account, version)) is not None:
+                self._push_eligible(entry)
+
+        selected: dict[str, AccountStats] = {}
+        for (_, order), heap in self._eligible.items():
+            if order not in orders:
+                continue
+
+            popped, num_of_selected = [], 0
+            while heap and num_of_selected < k:
+                item = heapq.heappop(heap)
+                if (entry := self._current(item[2], item[1])) is None:
+                    continue
+
+                popped.append(item)
+                if entry.account not in exclude:
+                    num_of_selected += 1
+                    selected.setdefault(entry.account, entry.stats(self.platform))
+
+            # Selected accounts stay eligible until their collect moves hold_until
+            for item in popped:
+                heapq.heappush(heap, item)
+
+        return list(selected.values())
+
+    async def _reload(self, started_at: datetime) -> None:
+        collect_statuses = await self._query(
+            CollectStatus.hold_until <= started_at + FULL_RELOAD_INTERVAL
+        ).sort("+last_synced_at").limit(self.max_entries).to_list()
+
+        self._entries, self._eligible, self._on_hold = {}, {}, []
+        for collect_status in collect_statuses:
+            self._put(collect_status, started_at)
+
+        # Deltas loaded while reloading went to the previous entries, read them again
+        self._refreshed_at = self._reloaded_at = started_at
+        print(f"{self.platform} - Reloaded {len(self._entries)} collect statuses")
+
+    def _reload_done(self, task: asyncio.Task) -> None:
+        self._reload_task = None
+        if not task.cancelled() and task.exception() is not None:
+            print(f"{self.platform} - Failed to reload collect statuses: {task.exception()}")
+
+    async def _load_delta(self, now: datetime) -> None:
+        since = self._refreshed_at - DELTA_MARGIN
+        num_of_updated = 0
+        async for collect_status in self._query(CollectStatus.hold_until >= since):
+            self._put(collect_status, now)
+            num_of_updated += 1
+
+        self._refreshed_at = now
+        self._evict(now)
+        self._compact()
+        print(f"{self.platform} - Refreshed {num_of_updated} collect statuses, {len(self._entries)} cached")
+
+    def _query(self, *conditions):
+        query = CollectStatus.find(CollectStatus.platform == self.platform, *conditions)
+        if self.shard_key_range:
+            min_shard_key, max_shard_key = self.shard_key_range
+            query = query.find(CollectStatus.shard_key >= min_shard_key, CollectStatus.shard_key < max_shard_key)
+        return query
+
+    def _put(self, collect_status: CollectStatus, now: datetime) -> None:
+        self._version += 1
+        entry = CachedStatus(
+            account=collect_status.account,
+            last_synced_at=collect_status.last_synced_at,
+            hold_until=collect_status.hold_until,
+            last_collected_at=collect_status.last_collected_at,
+            tx_rate=collect_status.tx_rate,
+            priority_tier=collect_status.priority_tier,
+            version=self._version
+        )
+        self._entries[entry.account] = entry
+
+        if entry.hold_until <= now:
+            self._push_eligible(entry)
+        else:
+            heapq.heappush(self._on_hold, (entry.hold_until, entry.version, entry.account))
+
+    def _push_eligible(self, entry: CachedStatus) -> None:
+        for order in CandidateOrder:
+            heap = self._eligible.setdefault((entry.priority_tier, order), [])
+            heapq.heappush(heap, (order.key(entry), entry.version, entry.account))
+
+    def _current(self, account: str, version: int) -> CachedStatus | None:
+        entry = self._entries.get(account)
+        return entry if entry is not None and entry.version == version else None
+
+    def _evict(self, now: datetime) -> None:
+        excess = len(self._entries) - self.max_entries
+        if excess <= 0:
+            return
+
+        def eviction_order(entry: CachedStatus) -> tuple[bool, datetime]:
+            is_held = entry.hold_until > now
+            return is_held, entry.hold_until if is_held else entry.last_synced_at
+
+        for entry in heapq.nlargest(excess, self._entries.values(), key=eviction_order):
+            del self._entries[entry.account]
+
+    def _compact(self) -> None:
+        # Outdated heap entries pile up between reloads, drop them once they outnumber the live ones
+        num_of_items = sum(map(len, self._eligible.values())) + len(self._on_hold)
+        if num_of_items <= 2 * (len(CandidateOrder) + 1) * len(self._entries) + 1024:
+            return
+
+        for heap in [*self._eligible.values(), self._on_hold]:
+            heap[:] = [item for item in heap if self._current(item[2], item[1])]
+            heapq.heapify(heap)
+
+
+_caches: dict[tuple[Platform, tuple[int, int] | None], CollectStatusCache] = {}
+
+
+def get_collect_status_cache(platform: Platform, shard_key_range: tuple[int, int] | None) -> CollectStatusCache:
+    key = (platform, shard_key_range)
+    if key not in _caches:
+        _caches[key] = CollectStatusCache(platform, shard_key_range)
+    return _caches[key]
@@ -0,0 +1,66 @@
+import hashlib
+import math
+from datetime import datetime
+from decimal import Decimal
+
+from beanie import Document
+from pymongo import IndexModel
+
+from libs.data_types.platform import Platform
+from libs.schema.amount import Amount
+
+COUNTERPARTY_REGISTERS = 256
+MAX_APPLIED_BATCHES = 16
+_REGISTER_BITS = 8
+_HASH_BITS = 64
+
+
+class AccountSummary(Document):
+    """Running totals of an account's collected transactions, maintained at ingest.
+
+    ``counterparty_registers`` is a HyperLogLog sketch of the distinct
+    counterparties, so it can be updated with ``$max`` like the totals are
+    with ``$inc``. ``applied_batches`` holds the ids of the latest batches
+    added, so a batch is never added twice. Transactions written before
+    summaries existed are added by ``python -m migrations.backfill_account_summaries``.
+    """
+    account: str
+    platform: Platform
+    num_of_tx: int = 0
+    total_in: Amount = Decimal(0)
+    total_out: Amount = Decimal(0)
+    first_timestamp: datetime | None = None
+    last_timestamp: datetime | None = None
+    counterparty_registers: dict[str, int] = {}
+    applied_batches: list[str] = []
+
+    @property
+    def num_of_counterparties(self) -> int:
+        return estimate_cardinality(self.counterparty_registers)
+
+    class Settings:
+        indexes = [
+            IndexModel(
+                ['account', 'platform'],
+                unique=True
+            )
+        ]
+
+
+def counterparty_register(counterparty: str) -> tuple[str, int]:
+    """Register of the counterparty in the sketch and the value it raises the register to."""
+    h = int.from_bytes(hashlib.blake2b(counterparty.encode(), digest_size=_HASH_BITS // 8).digest(), "big")
+    register = h & (COUNTERPARTY_REGISTERS - 1)
+    rest = h >> _REGISTER_BITS
+    return str(register), _HASH_BITS - _REGISTER_BITS - rest.bit_length() + 1
+
+
+def estimate_cardinality(registers: dict[str, int]) -> int:
+    m = COUNTERPARTY_REGISTERS
+    alpha = 0.7213 / (1 + 1.079 / m)
+    estimate = alpha * m * m / (sum(2.0 ** -value for value in registers.values()) + (m - len(registers)))
+
+    # Small range correction
+    if estimate <= 2.5 * m and len(registers) < m:
+        estimate = m * math.log(m / (m - len(registers)))
+    return round(estimate)
@@ -0,0 +1,13 @@
+from decimal import Decimal
+from typing import Annotated, Any
+
+from bson import Decimal128
+from pydantic import BeforeValidator
+
+
+def _from_decimal128(amount: Any) -> Any:
+    return amount.to_decimal() if isinstance(amount, Decimal128) else amount
+
+
+# Stored as Decimal128, wei amounts overflow the precision of a float
+Amount = Annotated[Decimal, BeforeValidator(_from_decimal128)]
@@ -1,12 +1,16 @@
+import zlib
 from datetime import datetime, UTC
 
 import pymongo
 from beanie import Document
+from pydantic import model_validator
 from pymongo import IndexModel
 
 from libs.data_types.platform import Platform
+from libs.data_types.priority_tier import PriorityTier
 
 BEGINNING_OF_TIME = datetime(1970, 1, 1, tzinfo=UTC)
+SHARD_KEY_SPACE = 1024
 
 
 class CollectStatus(Document):
@@ -14,6 +18,17 @@ class CollectStatus(Document):
     platform: Platform
     last_synced_at: datetime = BEGINNING_OF_TIME
     hold_until: datetime = BEGINNING_OF_TIME
+    shard_key: int = -1
+    last_collected_at: datetime = BEGINNING_OF_TIME
+    tx_rate: float = 0.0
+    empty_streak: int = 0
+    priority_tier: PriorityTier = PriorityTier.STANDARD
+
+    @model_validator(mode="after")
+    def _set_shard_key(self) -> "CollectStatus":
+        if self.shard_key < 0:
+            self.shard_key = account_shard_key(self.account)
+        return self
 
     class Settings:
         indexes = [
@@ -26,5 +41,31 @@ class CollectStatus(Document):
                  'hold_until',
                  ('last_synced_at', pymongo.ASCENDING)
                  ],
+            ),
+            IndexModel(
+                ['platform',
+                 'shard_key',
+                 'hold_until',
+                 ('last_synced_at', pymongo.ASCENDING)
+                 ],
+            ),
+            # Candidates of a tier in every candidate order, walked in sort order with hold_until checked in the index
+            IndexModel(
+                ['platform',
+                 'priority_tier',
+                 ('last_synced_at', pymongo.ASCENDING),
+                 'hold_until'
+                 ],
+            ),
+            IndexModel(
+                ['platform',
+                 'priority_tier',
+                 ('tx_rate', pymongo.DESCENDING),
+                 'hold_until'
+                 ],
             )
         ]
+
+
+def account_shard_key(account: str) -> int:
+    return zlib.crc32(account.encode()) % SHARD_KEY_SPACE
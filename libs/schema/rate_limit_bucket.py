@@ -0,0 +1,22 @@
+from datetime import datetime
+
+from beanie import Document
+from pymongo import IndexModel
+
+from libs.data_types.platform import Platform
+
+
+class RateLimitBucket(Document):
+    platform: Platform
+    api_key: str
+    tokens: float
+    updated_at: datetime
+    granted: bool = True
+
+    class Settings:
+        indexes = [
+            IndexModel(
+                ['platform', 'api_key'],
+                unique=True
+            )
+        ]
@@ -1,9 +1,15 @@
-from datetime import datetime
+import hashlib
+from datetime import datetime, UTC
+from decimal import Decimal
+from typing import Any
 
+import pymongo
 from beanie import Document
-from pydantic import BaseModel
+from pydantic import BaseModel, model_validator
+from pymongo import IndexModel
 
 from libs.data_types.platform import Platform
+from libs.schema.amount import Amount
 
 
 class Metadata(BaseModel):
@@ -15,10 +21,88 @@ class Metadata(BaseModel):
 class RawTransaction(Document):
     from_address: str
     to_address: str
-    amount: float
+    amount: Amount
     metadata: Metadata
+    tx_hash: str | None = None
+    log_index: int | None = None
+    key: str = ""
+
+    @model_validator(mode="after")
+    def _set_key(self) -> "RawTransaction":
+        if not self.key:
+            self.key = transaction_key(self)
+        return self
 
     class Settings:
         indexes = [
-            'metadata.timestamp'
+            'metadata.timestamp',
+            # Per-account range reads and retention deletes only walk the account's own transactions
+            IndexModel(
+                [('metadata.platform', pymongo.ASCENDING),
+                 ('metadata.account', pymongo.ASCENDING),
+                 ('metadata.timestamp', pymongo.ASCENDING)]
+            ),
+            # Partial, so it builds on collections with transactions written before keys existed.
+            # python -m migrations.backfill_transaction_keys keys them
+            IndexModel(
+                [('metadata.platform', pymongo.ASCENDING),
+                 ('metadata.account', pymongo.ASCENDING),
+                 ('key', pymongo.ASCENDING)],
+                unique=True,
+                partialFilterExpression={'key': {'$exists': True}}
+            ),
+            # Only transactions waiting to be added to the account summary carry a summary_batch
+            IndexModel(
+                [('metadata.platform', pymongo.ASCENDING),
+                 ('metadata.account', pymongo.ASCENDING),
+                 ('summary_batch', pymongo.ASCENDING)],
+                partialFilterExpression={'summary_batch': {'$exists': True}}
+            )
         ]
+
+
+def raw_transactions_query(platform: Platform,
+                           accounts: list[str] | None = None,
+                           since: datetime | None = None,
+                           until: datetime | None = None) -> dict[str, Any]:
+    """Filter of a platform's transactions, optionally of some accounts, from ``since`` until before ``until``."""
+    query: dict[str, Any] = {"metadata.platform": platform}
+    if accounts is not None:
+        query["metadata.account"] = {"$in": accounts}
+    if since is not None or until is not None:
+        query["metadata.timestamp"] = {
+            **({"$gte": since} if since is not None else {}),
+            **({"$lt": until} if until is not None else {}),
+        }
+    return query
+
+
+def transaction_key(raw_tx: RawTransaction) -> str:
+    """Deterministic natural key of a transaction within its account.
+
+    On-chain transactions are identified by their hash and log index, the
+    simulator has no hash so we fall back to the transaction content.
+    """
+    if raw_tx.tx_hash is not None:
+        parts = [raw_tx.tx_hash, str(raw_tx.log_index or 0)]
+    else:
+        parts = [raw_tx.from_address, raw_tx.to_address, _as_legacy_amount(raw_tx.amount),
+                 _as_naive_utc(raw_tx.metadata.timestamp).isoformat()]
+
+    parts = [raw_tx.metadata.platform, raw_tx.metadata.account, *parts]
+    return hashlib.sha1('|'.join(parts).encode()).hexdigest()
+
+
+def _as_naive_utc(timestamp: datetime) -> datetime:
+    # Keys were first derived from naive UTC timestamps, keep them stable whatever tzinfo a timestamp carries
+    if timestamp.tzinfo is None:
+        return timestamp
+    return timestamp.astimezone(UTC).replace(tzinfo=None)
+
+
+def _as_legacy_amount(amount: Decimal) -> str:
+    # Keys were first derived from float amounts ('123.0'), keep them stable for every amount a float could hold
+    as_float = float(amount)
+    if Decimal(str(as_float)) == amount:
+        return str(as_float)
+    return format(amount.normalize(), 'f')
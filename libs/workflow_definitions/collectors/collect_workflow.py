@@ -2,12 +2,39 @@ from pydantic import BaseModel
 
 from core.workflow_definition import WorkflowDefinition
 from libs.data_types.platform import Platform
-from libs.workflow_definitions.queues import Queues
+from libs.workflow_definitions.queues import Queues, collectors_queue
+
+
+MAX_ACCOUNTS_PER_SLOT = 4
+MAX_ITERATIONS_PER_RUN = 500
+MAX_HISTORY_LENGTH = 10_000
+
+# API keys of a platform's collect slots, shared by the orchestrator and the collector workers
+collectors = {
+    Platform.ETHEREUM: ['1', '2', '3'],
+    Platform.BINANCE: ['1', '2'],
+}
 
 
 class CollectTask(BaseModel):
     platform: Platform
-    wallet: str
+    wallets: list[str]
+    api_key: str
+    max_concurrency: int = MAX_ACCOUNTS_PER_SLOT
+    max_accounts: int = MAX_ACCOUNTS_PER_SLOT
+    max_pages_per_activity: int = 1
+    max_iterations: int = MAX_ITERATIONS_PER_RUN
+    max_history_length: int = MAX_HISTORY_LENGTH
+    num_of_tx_collected: int = 0
+    orchestrator_workflow_id: str | None = None
+    slot_id: int | None = None
+
+
+class CollectProgress(BaseModel):
+    accounts: list[str]
+    iteration: int
+    history_length: int
+    num_of_tx_collected: int
 
 
 class CollectDefinition(WorkflowDefinition):
@@ -15,6 +42,11 @@ class CollectDefinition(WorkflowDefinition):
     request = CollectTask
     response = int
 
+    @classmethod
+    def task_queue(cls, request: CollectTask | None = None) -> str:
+        # Each platform has its own collectors, so a backlog on one platform never holds back another
+        return collectors_queue(request.platform, request.api_key) if request else cls.queue
+
     @classmethod
     def _workflow_identifiers(cls, platform: Platform, slot_id: int, *args, **kwargs) -> str:
         return f'collect-{platform}-{slot_id}'
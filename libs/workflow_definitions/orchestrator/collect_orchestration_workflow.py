@@ -1,13 +1,68 @@
+import os
+
+from pydantic import BaseModel, model_validator
+
 from libs.data_types.platform import Platform
 from core.workflow_definition import WorkflowDefinition
+from libs.schema.collect_status import SHARD_KEY_SPACE
+from libs.workflow_definitions.collectors.collect_workflow import collectors
 from libs.workflow_definitions.queues import Queues
 
+ORCHESTRATOR_SHARDS = int(os.getenv("ORCHESTRATOR_SHARDS", "1"))
+
+
+class CollectOrchestrationRequest(BaseModel):
+    """One orchestrator shard, owning every ``num_of_shards``-th slot of a platform and a range of account hashes.
+
+    The hash range is sized in proportion to the slots the shard owns, so
+    every shard has the same number of accounts per slot.
+    """
+    platform: Platform
+    shard: int = 0
+    num_of_shards: int = 1
+    num_of_slots: int | None = None
+
+    @model_validator(mode="after")
+    def _check_every_shard_owns_a_slot(self) -> "CollectOrchestrationRequest":
+        if self.num_of_slots is not None and self.num_of_shards > self.num_of_slots:
+            raise ValueError(f"{self.platform} has {self.num_of_slots} slots, "
+                             f"{self.num_of_shards} shards would leave some without any")
+        return self
+
+    @property
+    def shard_key_range(self) -> tuple[int, int]:
+        if self.num_of_slots is None:
+            return (SHARD_KEY_SPACE * self.shard // self.num_of_shards,
+                    SHARD_KEY_SPACE * (self.shard + 1) // self.num_of_shards)
+
+        return (SHARD_KEY_SPACE * self._slots_owned_before(self.shard) // self.num_of_slots,
+                SHARD_KEY_SPACE * self._slots_owned_before(self.shard + 1) // self.num_of_slots)
+
+    def owns_slot(self, slot_id: int) -> bool:
+        return slot_id % self.num_of_shards == self.shard
+
+    def _slots_owned_before(self, shard: int) -> int:
+        return sum(len(range(i, self.num_of_slots, self.num_of_shards)) for i in range(shard))
+
+
+def shard_requests(platform: Platform) -> list[CollectOrchestrationRequest]:
+    """The orchestrator shards of a platform as configured now.
+
+    A platform never gets more shards than slots, a shard without slots would
+    own accounts nobody collects.
+    """
+    num_of_slots = len(collectors[platform])
+    num_of_shards = min(ORCHESTRATOR_SHARDS, num_of_slots)
+    return [CollectOrchestrationRequest(platform=platform, shard=shard, num_of_shards=num_of_shards,
+                                        num_of_slots=num_of_slots)
+            for shard in range(num_of_shards)]
+
 
 class CollectOrchestrationDefinition(WorkflowDefinition):
-    request = None
+    request = CollectOrchestrationRequest
     response = None
     queue = Queues.ORCHESTRATOR
 
     @classmethod
-    def _workflow_identifiers(cls, platform: Platform, slot_id: str, *args, **kwargs) -> str:
-        return f'collect-{platform}-{slot_id}'
+    def _workflow_identifiers(cls, platform: Platform, shard: int, *args, **kwargs) -> str:
+        return f'orchestrate-{platform}-{shard}'
@@ -1,6 +1,19 @@
+import os
 from enum import StrEnum
 
+from libs.data_types.platform import Platform
+
+COLLECTOR_QUEUE_PER_API_KEY = os.getenv("COLLECTOR_QUEUE_PER_API_KEY", "false").lower() == "true"
+
 
 class Queues(StrEnum):
     ORCHESTRATOR = 'orchestrator_queue'
     COLLECTORS = 'collectors_queue'
+
+
+def collectors_queue(platform: Platform, api_key: str | None = None) -> str:
+    """Task queue of a platform's collectors, or of one of its API keys with ``COLLECTOR_QUEUE_PER_API_KEY``."""
+    queue = f'{Queues.COLLECTORS}-{platform}'
+    if COLLECTOR_QUEUE_PER_API_KEY and api_key is not None:
+        queue = f'{queue}-{api_key}'
+    return queue
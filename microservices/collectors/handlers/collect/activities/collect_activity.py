@@ -1,20 +1,36 @@
-import asyncio
-from datetime import timedelta, datetime
+from datetime import datetime, timedelta, UTC
 from enum import StrEnum
-from random import randint
 
 from beanie.odm.operators.update.general import Set
 from pydantic import BaseModel
+from temporalio import activity
 
+from core.activity_options import ActivityOptions
 from core.worker import workflow_activity
+from libs.collect.raw_transaction_writer import RawTransactionWriter, DEFAULT_BATCH_SIZE
+from libs.collect.upstream import fetch_pages
 from libs.data_types.platform import Platform
+from libs.scheduling.cooldown import next_cooldown
+from libs.scheduling.policies import update_tx_rate
 from libs.schema.collect_status import CollectStatus, BEGINNING_OF_TIME
-from libs.schema.raw_transaction import RawTransaction, Metadata
+
+
+# Timeouts are per streamed page, a retry resumes from the last heartbeat checkpoint
+COLLECT_OPTIONS = ActivityOptions(
+    profile="collect",
+    start_to_close_timeout=timedelta(seconds=60),
+    heartbeat_timeout=timedelta(seconds=30),
+    initial_interval=timedelta(seconds=5),
+    maximum_interval=timedelta(minutes=2),
+)
 
 
 class CollectAction(BaseModel):
     platform: Platform
     account: str
+    api_key: str
+    batch_size: int = DEFAULT_BATCH_SIZE
+    max_pages: int = 1
 
 
 class CollectResult(StrEnum):
@@ -28,54 +44,91 @@ class CollectResponse(BaseModel):
     to_date: datetime
 
 
-@workflow_activity
+@workflow_activity(options=COLLECT_OPTIONS)
 async def collect(request: CollectAction) -> CollectResponse:
     collect_status = await CollectStatus.find(
         CollectStatus.platform == request.platform,
         CollectStatus.account == request.account
     ).first_or_none()
 
-    last_synced_at = collect_status.last_synced_at if collect_status else BEGINNING_OF_TIME
+    last_synced_at = _heartbeat_cursor() or (collect_status.last_synced_at if collect_status else BEGINNING_OF_TIME)
 
     print(f"{request.platform}-{request.account} - Collecting transactions from {last_synced_at}")
 
-    await asyncio.sleep(5)
-    num_of_tx = 0
-    num_of_iterations = randint(1, 5)
-    timestamp = last_synced_at
-    for i in range(num_of_iterations):
-        timestamp = timestamp + timedelta(days=randint(0, 10))
-        metadata = Metadata(account=request.account, timestamp=timestamp, platform=request.platform)
-        random_from_address = str(randint(1, 1000000000000))
-        random_to_address = str(randint(1, 1000000000000))
-        random_amount = randint(1, 1000000000000)
-        raw_tx = RawTransaction(from_address=random_from_address,
-                                to_address=random_to_address,
-                                amount=random_amount,
-                                metadata=metadata)
-        await raw_tx.save()
-        num_of_tx += 1
+    # Transactions newer than the previous collect arrived since then, the older ones are backlog
+    previous_collected_at = collect_status.last_collected_at if collect_status else BEGINNING_OF_TIME
+    num_of_tx = num_of_new_tx = 0
+    result = CollectResult.CONTINUE
+    async with RawTransactionWriter(platform=request.platform, account=request.account,
+                                    batch_size=request.batch_size) as writer:
+        # Waiting for rate limit tokens can take longer than the heartbeat timeout
+        async for page in fetch_pages(request.platform, request.account, request.api_key,
+                                      since=last_synced_at, max_pages=request.max_pages,
+                                      on_wait=lambda: activity.heartbeat(last_synced_at.isoformat())):
+            for raw_tx in page.transactions:
+                await writer.add(raw_tx)
+            await writer.flush()
+
+            # Only a written page is checkpointed, a retry resumes right after it
+            last_synced_at = writer.last_synced_at or last_synced_at
+            activity.heartbeat(last_synced_at.isoformat())
+            num_of_tx += len(page.transactions)
+            num_of_new_tx += sum(raw_tx.metadata.timestamp > previous_collected_at for raw_tx in page.transactions)
+
+            if not page.has_more:
+                result = CollectResult.STOP
 
     print(f"{request.platform}-{request.account} - Collected {num_of_tx} transactions")
 
-    rand = randint(1, 100)
-    if rand > 99:
+    if result == CollectResult.STOP:
         print(f"{request.platform}-{request.account} - No more transactions")
-        result = CollectResult.STOP
     else:
         print(f'{request.platform}-{request.account} - More transactions to collect')
-        result = CollectResult.CONTINUE
+
+    await _record_yield(request, collect_status, num_of_tx, num_of_new_tx, caught_up=result == CollectResult.STOP)
+
+    return CollectResponse(result=result, num_of_tx=num_of_tx, to_date=last_synced_at)
+
+
+def _heartbeat_cursor() -> datetime | None:
+    details = activity.info().heartbeat_details
+    if not details:
+        return None
+
+    print(f"Resuming from heartbeat checkpoint {details[0]}")
+    return datetime.fromisoformat(details[0])
+
+
+async def _record_yield(request: CollectAction,
+                        collect_status: CollectStatus | None,
+                        num_of_tx: int,
+                        num_of_new_tx: int,
+                        caught_up: bool) -> None:
+    now = datetime.now(UTC)
+    last_collected_at = collect_status.last_collected_at if collect_status else BEGINNING_OF_TIME
+    tx_rate = collect_status.tx_rate if collect_status else 0.0
+
+    # Only a caught-up collect has seen everything that arrived since the previous one,
+    # a collect still working through backlog would measure our throughput instead
+    if caught_up and last_collected_at > BEGINNING_OF_TIME:
+        tx_rate = update_tx_rate(tx_rate, num_of_new_tx, (now - last_collected_at).total_seconds() / 3600)
+
+    empty_streak = 0 if num_of_tx else (collect_status.empty_streak + 1 if collect_status else 1)
+
+    # An account with more to collect stays eligible, a caught-up one rests according to its yield
+    hold_until = now
+    if caught_up:
+        hold_until = now + next_cooldown(num_of_tx, empty_streak, tx_rate)
+        print(f"{request.platform}-{request.account} - Holding until {hold_until}")
 
     await CollectStatus.find_one(
         CollectStatus.account == request.account,
         CollectStatus.platform == request.platform
-    ).upsert(
-        Set({CollectStatus.last_synced_at: timestamp}),
-        on_insert=CollectStatus(
-            account=request.account,
-            platform=request.platform,
-            last_synced_at=last_synced_at
-        )
+    ).update(
+        Set({
+            CollectStatus.last_collected_at: now,
+            CollectStatus.tx_rate: tx_rate,
+            CollectStatus.empty_streak: empty_streak,
+            CollectStatus.hold_until: hold_until
+        })
     )
-
-    return CollectResponse(result=result, num_of_tx=num_of_tx, to_date=timestamp)
@@ -1,48 +1,152 @@
+import asyncio
+from collections import deque
+
 from temporalio import workflow
+from temporalio.exceptions import FailureError
 
 from core.broker_client import BrokerClient
 from core.worker import workflow_definition
-from libs.workflow_definitions.collectors.collect_workflow import CollectDefinition
+from libs.workflow_definitions.collectors.collect_workflow import CollectDefinition, CollectProgress, CollectTask, \
+    MAX_ACCOUNTS_PER_SLOT
 from microservices.collectors.handlers.collect.activities.collect_activity import CollectAction, collect, \
-    CollectResponse, CollectResult
+    CollectResponse, CollectResult, COLLECT_OPTIONS
 
 
 @workflow_definition(CollectDefinition)
 class CollectWorkflow:
+    """A slot collecting a queue of accounts.
+
+    Up to ``max_concurrency`` accounts are collected at once. Accounts that
+    have more transactions go back to the end of the queue after every page,
+    so small wallets get their turn without waiting for a slot rotation.
+    A slot holds at most ``max_accounts`` accounts, more are rejected and
+    left for the orchestrator to place again.
+
+    After ``max_iterations`` pages or ``max_history_length`` history events
+    the slot continues as new with its remaining accounts, keeping history
+    and replay cost bounded for long-lived wallets.
+    """
     _exit: bool
-    _account: str
+    _pending: deque[str]
+    _active: set[str]
+    _published_accounts: list[str]
+    _iteration: int
+    _num_of_tx_collected: int
 
     def __init__(self) -> None:
         self._exit = False
-        self._account = ""
+        self._pending = deque()
+        self._active = set()
+        self._published_accounts = []
+        self._iteration = 0
+        self._num_of_tx_collected = 0
+        self._max_iterations = 0
+        self._max_history_length = 0
+        self._max_accounts = MAX_ACCOUNTS_PER_SLOT
 
     @workflow.signal
     def exit(self) -> None:
-        print(f"Received exit signal {self._account}")
+        print(f"Received exit signal {self._accounts()}")
         self._exit = True
 
+    @workflow.signal
+    def add_account(self, account: str) -> None:
+        if account in self._active or account in self._pending:
+            return
+
+        # Also keeps the Account search attribute below its size limit
+        if len(self._active) + len(self._pending) >= self._max_accounts:
+            print(f"Rejected account {account}, the slot already has {self._max_accounts} accounts")
+            return
+
+        print(f"Received account {account}")
+        self._pending.append(account)
+        self._publish_accounts()
+
     @workflow.query
-    def account(self) -> str:
-        return self._account
+    def account(self) -> CollectProgress:
+        return CollectProgress(
+            accounts=self._accounts(),
+            iteration=self._iteration,
+            history_length=workflow.info().get_current_history_length(),
+            num_of_tx_collected=self._num_of_tx_collected
+        )
 
     @workflow.run
     async def run(self, collect_task: CollectDefinition.request) -> CollectDefinition.response:
-        self._account = collect_task.wallet
-        num_of_tx_collected = 0
+        self._pending.extend(collect_task.wallets)
+        self._num_of_tx_collected = collect_task.num_of_tx_collected
+        self._max_iterations = collect_task.max_iterations
+        self._max_history_length = collect_task.max_history_length
+        self._max_accounts = collect_task.max_accounts
+
+        lanes = [self._collect_lane(collect_task) for _ in range(collect_task.max_concurrency)]
+        await asyncio.gather(*lanes)
+
+        if not self._exit and self._pending:
+            print(f"Continuing as new after {self._iteration} iterations with {self._accounts()}")
+            workflow.continue_as_new(collect_task.model_copy(update=dict(
+                wallets=self._accounts(),
+                num_of_tx_collected=self._num_of_tx_collected
+            )))
+
+        await self._notify_slot_freed(collect_task)
+        return self._num_of_tx_collected
+
+    async def _collect_lane(self, collect_task: CollectTask) -> None:
+        while True:
+            await workflow.wait_condition(lambda: self._should_stop() or bool(self._pending) or not self._active)
+            if self._should_stop() or not self._pending:
+                return
+
+            account = self._pending.popleft()
+            self._active.add(account)
 
-        while not self._exit:
             collect_action = CollectAction(
                 platform=collect_task.platform,
-                account=collect_task.wallet)
+                account=account,
+                api_key=collect_task.api_key,
+                max_pages=collect_task.max_pages_per_activity)
 
             collect_response: CollectResponse = await BrokerClient.run_activity(
-                collect, collect_action
+                collect, collect_action,
+                start_to_close_timeout=COLLECT_OPTIONS.start_to_close_timeout * collect_task.max_pages_per_activity
             )
 
-            num_of_tx_collected += collect_response.num_of_tx
+            self._iteration += 1
+            self._num_of_tx_collected += collect_response.num_of_tx
+            self._active.remove(account)
 
             if collect_response.result == CollectResult.STOP:
-                print(f"Stopping collection from {collect_task.platform} {collect_task.wallet}")
-                self._exit = True
+                print(f"Stopping collection from {collect_task.platform} {account}")
+                self._publish_accounts()
+            else:
+                self._pending.append(account)
+
+    @staticmethod
+    async def _notify_slot_freed(collect_task: CollectTask) -> None:
+        if collect_task.orchestrator_workflow_id is None:
+            return
+
+        # Sent before this workflow closes, the orchestrator retries a start of the slot that races it
+        handle = workflow.get_external_workflow_handle(collect_task.orchestrator_workflow_id)
+        try:
+            await handle.signal('slot_freed', collect_task.slot_id)
+        except FailureError as e:
+            # The orchestrator's polling picks the slot up anyway
+            print(f"Could not notify orchestrator {collect_task.orchestrator_workflow_id}: {e}")
+
+    def _should_stop(self) -> bool:
+        return (self._exit
+                or self._iteration >= self._max_iterations
+                or workflow.info().get_current_history_length() >= self._max_history_length)
+
+    def _accounts(self) -> list[str]:
+        return [*sorted(self._active), *self._pending]
 
-        return num_of_tx_collected
+    def _publish_accounts(self) -> None:
+        # Keeps the Account search attribute in sync so prepare_collect skips accounts queued here
+        accounts = sorted({*self._active, *self._pending})
+        if accounts and accounts != self._published_accounts:
+            self._published_accounts = accounts
+            workflow.upsert_search_attributes({'Account': accounts})
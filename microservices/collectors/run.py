@@ -21,10 +21,18 @@
 import asyncio
 
 from core.worker import BaseWorker
+from core.worker_tuning import IO_HEAVY_COLLECTOR
+from libs.workflow_definitions.collectors.collect_workflow import collectors
+from libs.workflow_definitions.queues import collectors_queue
 from microservices.collectors.handlers.collect.activities.collect_activity import collect
 from microservices.collectors.handlers.collect.collect_workflow import CollectWorkflow
 
-CollectorWorker = BaseWorker(name="collector")
+# Polls the queues of every platform, or of every API key of the slots with COLLECTOR_QUEUE_PER_API_KEY,
+# unless WORKER_QUEUES names some of them
+CollectorWorker = BaseWorker(name="collector", tuning=IO_HEAVY_COLLECTOR,
+                             queues=list(dict.fromkeys(collectors_queue(platform, api_key)
+                                                       for platform, api_keys in collectors.items()
+                                                       for api_key in api_keys)))
 
 CollectorWorker.handle(handler=CollectWorkflow,
                        activities=[collect])
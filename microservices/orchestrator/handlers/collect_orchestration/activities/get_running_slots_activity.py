@@ -1,16 +1,29 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from pydantic import BaseModel
 from temporalio.client import WorkflowExecution
 
+from core.activity_options import ActivityOptions
 from core.broker_client import BrokerClient
 from core.worker import workflow_activity
 from libs.data_types.platform import Platform
 
 
+# A single visibility query, a stuck call should not hold the tick for long
+GET_RUNNING_SLOTS_OPTIONS = ActivityOptions(
+    profile="orchestrator-read",
+    start_to_close_timeout=timedelta(seconds=10),
+    initial_interval=timedelta(milliseconds=500),
+    maximum_attempts=3,
+    local=True,
+    local_budget=timedelta(seconds=2),
+)
+
+
 class RunningSlot(BaseModel):
     id: int
     start_time: datetime
+    num_of_accounts: int = 0
 
 
 class GetRunningSlotsResponse(BaseModel):
@@ -21,7 +34,7 @@ class GetRunningSlotsAction(BaseModel):
     platform: Platform
 
 
-@workflow_activity
+@workflow_activity(options=GET_RUNNING_SLOTS_OPTIONS)
 async def get_running_slots(
         action: GetRunningSlotsAction) -> GetRunningSlotsResponse:
     client = await BrokerClient.client()
@@ -36,5 +49,6 @@ async def get_running_slots(
 def _extract_slot(workflow: WorkflowExecution) -> RunningSlot:
     return RunningSlot(
         id=int(workflow.id.split('-')[-1]),
-        start_time=workflow.start_time
+        start_time=workflow.start_time,
+        num_of_accounts=len(workflow.search_attributes.get('Account', []))
     )
@@ -0,0 +1,38 @@
+from datetime import timedelta
+
+from pydantic import BaseModel
+
+from core.activity_options import ActivityOptions
+from core.worker import workflow_activity
+from libs.data_types.platform import Platform
+from libs.workflow_definitions.orchestrator.collect_orchestration_workflow import CollectOrchestrationRequest, \
+    shard_requests
+
+
+# Reads the worker's configuration, no I/O
+GET_SHARD_CONFIG_OPTIONS = ActivityOptions(
+    profile="orchestrator-read",
+    start_to_close_timeout=timedelta(seconds=10),
+    initial_interval=timedelta(milliseconds=500),
+    maximum_attempts=3,
+    local=True,
+    local_budget=timedelta(seconds=2),
+)
+
+
+class GetShardConfigAction(BaseModel):
+    platform: Platform
+    shard: int
+
+
+class GetShardConfigResponse(BaseModel):
+    # None once the shard no longer exists
+    request: CollectOrchestrationRequest | None = None
+
+
+@workflow_activity(options=GET_SHARD_CONFIG_OPTIONS)
+async def get_shard_config(action: GetShardConfigAction) -> GetShardConfigResponse:
+    requests = shard_requests(action.platform)
+    return GetShardConfigResponse(
+        request=requests[action.shard] if action.shard < len(requests) else None
+    )
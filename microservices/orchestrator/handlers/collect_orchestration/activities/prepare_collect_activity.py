@@ -1,18 +1,43 @@
-from datetime import datetime
+import asyncio
+import os
+from datetime import datetime, timedelta, UTC
 
 from beanie.odm.queries.find import FindMany
 from pydantic import BaseModel
-from temporalio import activity
 
+from core.activity_options import ActivityOptions
 from core.broker_client import BrokerClient
 from core.worker import workflow_activity
 from libs.data_types.platform import Platform
+from libs.data_types.priority_tier import PriorityTier
 from libs.schema.collect_status import CollectStatus
+from libs.scheduling.policies import AccountStats, CandidateOrder, get_policy
+from libs.scheduling.scheduler import select_accounts
+from libs.scheduling.status_cache import COLLECT_STATUS_CACHE_SIZE, get_collect_status_cache
+
+SCHEDULING_POLICY = os.getenv("SCHEDULING_POLICY", "oldest-first")
+
+
+# Cheap bookkeeping reads, fail fast and let the next orchestrator tick retry
+PREPARE_COLLECT_OPTIONS = ActivityOptions(
+    profile="orchestrator-read",
+    start_to_close_timeout=timedelta(seconds=10),
+    initial_interval=timedelta(milliseconds=500),
+    maximum_attempts=3,
+    local=True,
+    local_budget=timedelta(seconds=2),
+)
 
 
 class PrepareCollectAction(BaseModel):
     platform: Platform
     num_of_slots: int
+    accounts_per_slot: int = 1
+    shard_key_range: tuple[int, int] | None = None
+
+    @property
+    def num_of_accounts(self) -> int:
+        return self.num_of_slots * self.accounts_per_slot
 
 
 class AccountToCollect(BaseModel):
@@ -25,12 +50,26 @@ class PrepareCollectResponse(BaseModel):
     accounts_to_collect: list[AccountToCollect]
 
 
-@workflow_activity
+@workflow_activity(options=PREPARE_COLLECT_OPTIONS)
 async def prepare_collect(action: PrepareCollectAction) -> PrepareCollectResponse:
+    running_accounts = await _get_running_accounts(action.platform)
+    policy = get_policy(SCHEDULING_POLICY)
+    now = datetime.now(UTC)
+
+    # Every tier in every order the policy needs, so the tiers share the picks and the policy sees its best accounts
+    num_of_candidates = action.num_of_accounts * policy.candidate_factor
+    if COLLECT_STATUS_CACHE_SIZE:
+        cache = get_collect_status_cache(action.platform, action.shard_key_range)
+        await cache.refresh(now)
+        candidates = cache.candidates(num_of_candidates, now, exclude=running_accounts, orders=policy.candidate_orders)
+    else:
+        candidates = await _get_candidates(action, policy.candidate_orders, num_of_candidates, running_accounts)
+
+    selected = select_accounts(candidates, action.num_of_accounts, policy, now=now)
+
     accounts_to_collect = [
-        AccountToCollect(account=collect_status.account, last_synced_at=collect_status.last_synced_at)
-        async for collect_status
-        in _get_collect_statuses(action) if not await _is_currently_running(collect_status)
+        AccountToCollect(account=stats.account, last_synced_at=stats.last_synced_at)
+        for stats in selected
     ]
 
     return PrepareCollectResponse(
@@ -39,24 +78,63 @@ async def prepare_collect(action: PrepareCollectAction) -> PrepareCollectRespons
     )
 
 
-def _get_collect_statuses(action) -> FindMany[CollectStatus]:
-    return CollectStatus.find(
+async def _get_candidates(action: PrepareCollectAction,
+                          orders: tuple[CandidateOrder, ...],
+                          num_of_candidates: int,
+                          running_accounts: set[str]) -> list[AccountStats]:
+    queries = [
+        _get_collect_statuses(action, tier, order, num_of_candidates + len(running_accounts)).to_list()
+        for tier in PriorityTier
+        for order in orders
+    ]
+
+    candidates: dict[str, AccountStats] = {}
+    for collect_statuses in await asyncio.gather(*queries):
+        # Running accounts are filtered out in memory, every query over-fetches to make up for them
+        for collect_status in collect_statuses:
+            if collect_status.account not in running_accounts:
+                candidates.setdefault(collect_status.account, _account_stats(collect_status))
+    return list(candidates.values())
+
+
+def _get_collect_statuses(action: PrepareCollectAction,
+                          tier: PriorityTier,
+                          order: CandidateOrder,
+                          limit: int) -> FindMany[CollectStatus]:
+    query = CollectStatus.find(
         CollectStatus.platform == action.platform,
-        CollectStatus.hold_until <= datetime.now()
-    ).sort(
-        "+last_synced_at"
+        CollectStatus.priority_tier == tier,
+        CollectStatus.hold_until <= datetime.now(UTC)
+    )
+
+    if action.shard_key_range:
+        min_shard_key, max_shard_key = action.shard_key_range
+        query = query.find(CollectStatus.shard_key >= min_shard_key, CollectStatus.shard_key < max_shard_key)
+
+    return query.sort(
+        order
     ).limit(
-        action.num_of_slots
+        limit
+    )
+
+
+def _account_stats(collect_status: CollectStatus) -> AccountStats:
+    return AccountStats(
+        account=collect_status.account,
+        platform=collect_status.platform,
+        last_synced_at=collect_status.last_synced_at,
+        last_collected_at=collect_status.last_collected_at,
+        tx_rate=collect_status.tx_rate,
+        priority_tier=collect_status.priority_tier
     )
 
 
-async def _is_currently_running(collect_status: CollectStatus) -> bool:
+async def _get_running_accounts(platform: Platform) -> set[str]:
     client = await BrokerClient.client()
 
-    async for workflow in client.list_workflows(
-            f"Platform = '{collect_status.platform}' AND Account = '{collect_status.account}' AND ExecutionStatus = 'Running'",
-            page_size=1):
-        print(f"{collect_status.platform} {collect_status.account} is currently running on slot {workflow.id}")
-        return True
+    running_accounts = set()
+    async for workflow in client.list_workflows(f"Platform = '{platform}' AND ExecutionStatus = 'Running'"):
+        running_accounts.update(workflow.search_attributes.get('Account', []))
 
-    return False
+    print(f"{platform} - {len(running_accounts)} accounts currently running")
+    return running_accounts
@@ -1,130 +1,197 @@
-from datetime import timedelta, datetime
+import asyncio
+from datetime import datetime, timedelta
 
-from pydantic import BaseModel
 from temporalio import workflow
 from temporalio.common import WorkflowIDReusePolicy
-from temporalio.exceptions import WorkflowAlreadyStartedError
+from temporalio.exceptions import WorkflowAlreadyStartedError, FailureError
 
 from core.broker_client import BrokerClient
 from core.worker import workflow_definition
 from libs.data_types.platform import Platform
-from libs.workflow_definitions.collectors.collect_workflow import CollectDefinition
+from libs.workflow_definitions.collectors.collect_workflow import CollectDefinition, MAX_ACCOUNTS_PER_SLOT, collectors
 from libs.workflow_definitions.orchestrator.collect_orchestration_workflow import CollectOrchestrationDefinition
-from microservices.orchestrator.handlers.collect_orchestration.activities.get_running_slots_activity import RunningSlot, \
+from microservices.orchestrator.handlers.collect_orchestration.activities.get_running_slots_activity import \
     GetRunningSlotsAction, GetRunningSlotsResponse, get_running_slots
+from microservices.orchestrator.handlers.collect_orchestration.activities.get_shard_config_activity import \
+    GetShardConfigAction, GetShardConfigResponse, get_shard_config
 from microservices.orchestrator.handlers.collect_orchestration.activities.prepare_collect_activity import \
-    prepare_collect, PrepareCollectAction, AccountToCollect, PrepareCollectResponse
+    prepare_collect, PrepareCollectAction, PrepareCollectResponse
+from microservices.orchestrator.handlers.collect_orchestration.slot_manager import Slot, SlotManager
 
-collectors = {
-    Platform.ETHEREUM: ['1', '2', '3'],
-    Platform.BINANCE: ['1', '2'],
-}
-
-COOLDOWN_HOURS = 2
-
-
-class Slot(BaseModel):
-    id: int
-    api_key: str
-    is_running: bool
+POLL_INTERVAL = timedelta(minutes=1)
+MAX_TICKS_PER_RUN = 100
+SLOT_ROTATION_AGE = timedelta(hours=1)
+START_RETRY_INTERVAL = timedelta(seconds=5)
+# Slots starting an account whose cursor is older than this stream several pages per collect activity
+BACKFILL_AGE = timedelta(days=1)
+BACKFILL_PAGES_PER_ACTIVITY = 10
 
 
 @workflow_definition(CollectOrchestrationDefinition)
 class CollectOrchestrationWorkflow:
-    def __init__(self):
-        self._cooldown = timedelta(hours=COOLDOWN_HOURS)
-
-    async def run(self) -> CollectOrchestrationDefinition.response:
-        print("**** Starting CollectOrchestrationWorkflow")
-        for platform, platform_configs in collectors.items():
-            num_of_slots = len(platform_configs)
-            prepare_collect_action = PrepareCollectAction(
-                platform=platform,
-                num_of_slots=num_of_slots
-            )
-
-            print(f"**** Preparing collection from {platform}")
+    """Long running orchestrator of a platform shard.
 
-            prepare_collect_response: PrepareCollectResponse = await BrokerClient.run_activity(
-                prepare_collect, prepare_collect_action
-            )
+    A tick runs as soon as a slot reports it is free through ``slot_freed``,
+    and at least every ``POLL_INTERVAL`` as a safety net.
+    """
+    _slots: SlotManager
 
-            print(f"**** Current time: {prepare_collect_response.current_time}")
-
-            if not prepare_collect_response.accounts_to_collect:
-                print(f"**** No accounts to collect from {platform}")
-                continue
-
-            get_running_slots_action = GetRunningSlotsAction(
-                platform=platform
-            )
-
-            running_slots_response: GetRunningSlotsResponse = await BrokerClient.run_activity(
-                get_running_slots, get_running_slots_action
+    def __init__(self):
+        self._freed_slot_ids: set[int] = set()
+        self._cursors: dict[str, datetime] = {}
+
+    @workflow.signal
+    def slot_freed(self, slot_id: int) -> None:
+        print(f"**** Slot {slot_id} is free")
+        self._freed_slot_ids.add(slot_id)
+
+    async def run(self, request: CollectOrchestrationDefinition.request) -> CollectOrchestrationDefinition.response:
+        self._slots = SlotManager(request, collectors[request.platform], rotation_age=SLOT_ROTATION_AGE,
+                                  max_accounts_per_slot=MAX_ACCOUNTS_PER_SLOT)
+
+        ticks = 0
+        # Accounts queued on a slot only live in this run, so don't continue as new before they start
+        while ticks < MAX_TICKS_PER_RUN or self._slots.pending_accounts():
+            await self._tick(request)
+            ticks += 1
+
+            # A slot freed a moment ago may still be closing, its start is retried shortly
+            timeout = START_RETRY_INTERVAL if self._slots.is_waiting_to_start() else POLL_INTERVAL
+            try:
+                await workflow.wait_condition(lambda: bool(self._freed_slot_ids), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+        # The shards may have been reconfigured since this run started
+        shard_config: GetShardConfigResponse = await BrokerClient.run_activity(
+            get_shard_config, GetShardConfigAction(platform=request.platform, shard=request.shard)
+        )
+        if shard_config.request is None:
+            print(f"**** Shard {request.shard} of {request.platform} was removed, its slots are left to the others")
+            return
+
+        workflow.continue_as_new(shard_config.request)
+
+    async def _tick(self, request: CollectOrchestrationDefinition.request) -> None:
+        freed_slot_ids, self._freed_slot_ids = self._freed_slot_ids, set()
+        platform = request.platform
+        print(f"**** Starting CollectOrchestrationWorkflow {platform} shard {request.shard}/{request.num_of_shards}")
+
+        running_slots_response: GetRunningSlotsResponse = await BrokerClient.run_activity(
+            get_running_slots, GetRunningSlotsAction(platform=platform)
+        )
+
+        ready_slots = self._slots.sync(running_slots_response.slots, freed_slot_ids, now=workflow.now())
+        print(f"**** Slots: {self._slots}")
+
+        # Accounts queued behind a drained slot, or on a slot that failed to start, start the moment it is free
+        await asyncio.gather(*(self._start_slot(platform, slot, slot.pending) for slot in ready_slots))
+
+        prepare_collect_action = PrepareCollectAction(
+            platform=platform,
+            num_of_slots=len(self._slots),
+            accounts_per_slot=MAX_ACCOUNTS_PER_SLOT,
+            shard_key_range=request.shard_key_range if request.num_of_shards > 1 else None
+        )
+
+        print(f"**** Preparing collection from {platform}")
+
+        prepare_collect_response: PrepareCollectResponse = await BrokerClient.run_activity(
+            prepare_collect, prepare_collect_action
+        )
+
+        print(f"**** Current time: {prepare_collect_response.current_time}")
+
+        # Accounts resting in their cooldown are already filtered out by prepare_collect through hold_until
+        pending_accounts = self._slots.pending_accounts()
+        self._cursors = {account: cursor for account, cursor in self._cursors.items() if account in pending_accounts}
+        self._cursors.update((account_to_collect.account, account_to_collect.last_synced_at)
+                             for account_to_collect in prepare_collect_response.accounts_to_collect
+                             if account_to_collect.account not in pending_accounts)
+        accounts = [account_to_collect.account for account_to_collect in prepare_collect_response.accounts_to_collect
+                    if account_to_collect.account not in pending_accounts]
+
+        if not accounts:
+            print(f"**** No accounts to collect from {platform}")
+            return
+
+        await self._assign_accounts(platform, accounts)
+
+    async def _assign_accounts(self, platform: Platform, accounts: list[str]) -> None:
+        batches = [accounts[i:i + MAX_ACCOUNTS_PER_SLOT] for i in range(0, len(accounts), MAX_ACCOUNTS_PER_SLOT)]
+        tasks = []
+
+        # Free slots are filled first
+        for slot in self._slots.free_slots():
+            if not batches:
+                break
+            tasks.append(self._start_slot(platform, slot, batches.pop(0)))
+
+        # Then the oldest running slots are rotated, their batch waits for them to drain
+        now = workflow.now()
+        running_slots = self._slots.running_slots()
+        while batches and running_slots and self._slots.is_due_for_rotation(running_slots[0], now):
+            tasks.append(self._drain_slot(platform, running_slots.pop(0), batches.pop(0)))
+
+        # Whatever is left is queued on the slots that keep running as far as they have room,
+        # the rest is picked again on a later tick
+        leftover = [account for batch in batches for account in batch]
+        for slot in running_slots:
+            if leftover and (capacity := self._slots.capacity(slot)):
+                slot_accounts, leftover = leftover[:capacity], leftover[capacity:]
+                self._slots.queue(slot, len(slot_accounts), now)
+                tasks.append(self._queue_on_slot(platform, slot, slot_accounts))
+
+        # Slots are independent of each other, start and signal them all at once
+        await asyncio.gather(*tasks)
+
+    async def _start_slot(self, platform: Platform, slot: Slot, slot_accounts: list[str]) -> None:
+        print(f"**** Starting collection from {platform} {slot_accounts} on slot {slot.id}")
+        now = workflow.now()
+        backfill = any(now - self._cursors.get(account, now) > BACKFILL_AGE for account in slot_accounts)
+        collect_task = CollectDefinition.request(
+            platform=platform,
+            wallets=slot_accounts,
+            api_key=slot.api_key,
+            max_accounts=MAX_ACCOUNTS_PER_SLOT,
+            max_pages_per_activity=BACKFILL_PAGES_PER_ACTIVITY if backfill else 1,
+            orchestrator_workflow_id=workflow.info().workflow_id,
+            slot_id=slot.id
+        )
+        try:
+            await BrokerClient.start_child_workflow(
+                CollectDefinition, collect_task,
+                workflow_id=CollectDefinition.generate_workflow_id(platform=platform, slot_id=slot.id),
+                parent_close_policy=workflow.ParentClosePolicy.ABANDON,
+                id_reuse_policy=WorkflowIDReusePolicy.ALLOW_DUPLICATE,
+                search_attributes={'Platform': [platform], 'Account': collect_task.wallets}
             )
-
-            print(f"**** Number of running slots: {len(running_slots_response.slots)}/ {num_of_slots}")
-            topology = self._build_topology(platform_configs=platform_configs,
-                                            running_slots=running_slots_response.slots)
-
-            print(f"**** Topology: {topology}")
-
-            for account_to_collect in prepare_collect_response.accounts_to_collect:
-                if self._is_in_cooldown(account_to_collect, prepare_collect_response.current_time):
-                    print(f"**** Skipping collection from {platform} {account_to_collect.account}")
-                    continue
-
-                chosen_slot = topology.pop(0)
-                workflow_id = CollectDefinition.generate_workflow_id(platform=platform, slot_id=chosen_slot.id)
-                if chosen_slot.is_running:
-                    print(f"**** Slot {chosen_slot.id} is running, stopping it")
-                    handle = workflow.get_external_workflow_handle(workflow_id)
-                    await handle.signal('exit')
-                    continue
-
-                print(f"**** Starting collection from {platform} {account_to_collect.account}")
-                collect_task = CollectDefinition.request(
-                    platform=platform,
-                    wallet=account_to_collect.account
-                )
-
-                try:
-                    await BrokerClient.run_child_workflow(
-                        CollectDefinition, collect_task,
-                        workflow_id=workflow_id,
-                        parent_close_policy=workflow.ParentClosePolicy.ABANDON,
-                        id_reuse_policy=WorkflowIDReusePolicy.ALLOW_DUPLICATE,
-                        search_attributes={'Platform': [platform], 'Account': [collect_task.wallet]}
-                    )
-                except WorkflowAlreadyStartedError as e:
-                    print(f"**** Workflow already started: {e}")
-
-    def _build_topology(self, platform_configs: list[str], running_slots: list[RunningSlot]) -> list[Slot]:
-        slots = []
-        running_slot_ids = [slot.id for slot in running_slots]
-
-        for slot_id, api_key in enumerate(platform_configs):
-            if slot_id in running_slot_ids:
-                continue
-
-            slots.append(Slot(
-                id=slot_id,
-                api_key=api_key,
-                is_running=False
-            ))
-
-        for slot in sorted(running_slots, key=lambda x: x.start_time):
-            if slot.id >= len(platform_configs):
-                print(f"**** Slot {slot.id} is not in platform configs")
-                continue
-
-            slots.append(Slot(
-                id=slot.id,
-                api_key=platform_configs[slot.id],
-                is_running=True
-            ))
-
-        return slots
-
-    def _is_in_cooldown(self, account_to_collect: AccountToCollect, current_time: datetime) -> bool:
-        return account_to_collect.last_synced_at + self._cooldown > current_time
+        except WorkflowAlreadyStartedError as e:
+            print(f"**** Slot {slot.id} could not be started, its previous workflow is still open: {e}")
+            if not self._slots.start_failed(slot, slot_accounts, now):
+                print(f"**** Slot {slot.id} is still running, giving up on starting {slot_accounts} on it")
+            return
+
+        self._slots.mark_running(slot, started_at=now, num_of_accounts=len(slot_accounts))
+
+    async def _drain_slot(self, platform: Platform, slot: Slot, slot_accounts: list[str]) -> None:
+        print(f"**** Slot {slot.id} is due for rotation, queueing {slot_accounts} behind it")
+        self._slots.drain(slot, slot_accounts)
+
+        handle = workflow.get_external_workflow_handle(
+            CollectDefinition.generate_workflow_id(platform=platform, slot_id=slot.id)
+        )
+        try:
+            await handle.signal('exit')
+        except FailureError as e:
+            print(f"**** Slot {slot.id} finished before it could be drained: {e}")
+
+    async def _queue_on_slot(self, platform: Platform, slot: Slot, slot_accounts: list[str]) -> None:
+        print(f"**** Slot {slot.id} is running, queueing {slot_accounts} on it")
+        handle = workflow.get_external_workflow_handle(
+            CollectDefinition.generate_workflow_id(platform=platform, slot_id=slot.id)
+        )
+        try:
+            await asyncio.gather(*(handle.signal('add_account', account) for account in slot_accounts))
+        except FailureError as e:
+            print(f"**** Slot {slot.id} finished before it could be signalled: {e}")
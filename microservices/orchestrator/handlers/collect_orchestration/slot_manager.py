@@ -0,0 +1,150 @@
+from datetime import datetime, timedelta
+from enum import StrEnum
+
+from pydantic import BaseModel
+
+from libs.workflow_definitions.orchestrator.collect_orchestration_workflow import CollectOrchestrationRequest
+from microservices.orchestrator.handlers.collect_orchestration.activities.get_running_slots_activity import \
+    RunningSlot
+
+
+VISIBILITY_LAG = timedelta(minutes=1)
+
+
+class SlotStatus(StrEnum):
+    FREE = "FREE"
+    RUNNING = "RUNNING"
+    DRAINING = "DRAINING"
+
+
+class Slot(BaseModel):
+    id: int
+    api_key: str
+    status: SlotStatus = SlotStatus.FREE
+    started_at: datetime | None = None
+    num_of_accounts: int = 0
+    queued_at: datetime | None = None
+    pending: list[str] = []
+    start_failed_at: datetime | None = None
+
+
+class SlotManager:
+    """State of the slots owned by an orchestrator shard, kept across ticks.
+
+    A slot running for longer than ``rotation_age`` is drained when accounts
+    are waiting: it is asked to exit and the accounts are queued behind it,
+    to be started as soon as it reports itself free.
+
+    The accounts of a running slot are counted, so no more than
+    ``max_accounts_per_slot`` are ever queued on it. A slot is only marked
+    running once its workflow has started. A slot reports itself free just
+    before its workflow closes, so a start can fail for a moment: the accounts
+    stay queued on the free slot and its start is retried, for up to
+    ``VISIBILITY_LAG`` before the accounts go back to the pool.
+    """
+
+    def __init__(self,
+                 request: CollectOrchestrationRequest,
+                 platform_configs: list[str],
+                 rotation_age: timedelta,
+                 max_accounts_per_slot: int):
+        self.rotation_age = rotation_age
+        self.max_accounts_per_slot = max_accounts_per_slot
+        self._slots = {
+            slot_id: Slot(id=slot_id, api_key=api_key)
+            for slot_id, api_key in enumerate(platform_configs)
+            if request.owns_slot(slot_id)
+        }
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __repr__(self) -> str:
+        return repr({slot_id: slot.status for slot_id, slot in self._slots.items()})
+
+    def sync(self, running_slots: list[RunningSlot], freed_slot_ids: set[int], now: datetime) -> list[Slot]:
+        """Reconcile with visibility and return the free slots that have accounts queued on them.
+
+        Visibility lags behind, so slots that reported themselves free are
+        trusted over it, a slot we just started is only considered gone once
+        it has been missing for ``VISIBILITY_LAG``, and the accounts just
+        queued on a slot are counted until visibility catches up.
+        """
+        running = {slot.id: slot for slot in running_slots if slot.id not in freed_slot_ids}
+
+        for slot_id, slot in self._slots.items():
+            if slot_id in running:
+                # Accounts queued on a free slot are waiting for its previous workflow to close, it isn't adopted
+                if slot.status == SlotStatus.FREE and slot.pending:
+                    continue
+
+                if slot.status == SlotStatus.FREE:
+                    slot.status = SlotStatus.RUNNING
+                    slot.started_at = running[slot_id].start_time
+
+                if slot.queued_at is None or now - slot.queued_at >= VISIBILITY_LAG:
+                    slot.num_of_accounts = running[slot_id].num_of_accounts
+                else:
+                    slot.num_of_accounts = max(slot.num_of_accounts, running[slot_id].num_of_accounts)
+                continue
+
+            if slot.status == SlotStatus.FREE:
+                continue
+
+            if slot_id in freed_slot_ids or slot.started_at is None or now - slot.started_at >= VISIBILITY_LAG:
+                slot.status = SlotStatus.FREE
+                slot.num_of_accounts = 0
+
+        return [slot for slot in self._slots.values() if slot.status == SlotStatus.FREE and slot.pending]
+
+    def mark_running(self, slot: Slot, started_at: datetime, num_of_accounts: int) -> None:
+        slot.status = SlotStatus.RUNNING
+        slot.started_at = started_at
+        slot.num_of_accounts = num_of_accounts
+        slot.queued_at = started_at
+        slot.pending = []
+        slot.start_failed_at = None
+
+    def start_failed(self, slot: Slot, accounts: list[str], now: datetime) -> bool:
+        """Keep the accounts queued on the slot to retry its start, returns whether it is retried."""
+        if slot.start_failed_at is None:
+            slot.start_failed_at = now
+
+        if now - slot.start_failed_at >= VISIBILITY_LAG:
+            # Its workflow is not closing after all, visibility adopts it and the accounts are picked again
+            slot.pending = []
+            slot.start_failed_at = None
+            return False
+
+        slot.pending = list(accounts)
+        return True
+
+    def is_waiting_to_start(self) -> bool:
+        return any(slot.status == SlotStatus.FREE and slot.pending for slot in self._slots.values())
+
+    def queue(self, slot: Slot, num_of_accounts: int, now: datetime) -> None:
+        slot.num_of_accounts += num_of_accounts
+        slot.queued_at = now
+
+    def capacity(self, slot: Slot) -> int:
+        return max(0, self.max_accounts_per_slot - slot.num_of_accounts)
+
+    def drain(self, slot: Slot, accounts: list[str]) -> None:
+        slot.status = SlotStatus.DRAINING
+        slot.pending.extend(accounts)
+
+    def free_slots(self) -> list[Slot]:
+        return [slot for slot in self._slots.values() if slot.status == SlotStatus.FREE and not slot.pending]
+
+    def running_slots(self) -> list[Slot]:
+        return sorted((slot for slot in self._slots.values() if slot.status == SlotStatus.RUNNING),
+                      key=lambda slot: slot.started_at)
+
+    def is_draining(self) -> bool:
+        return any(slot.status == SlotStatus.DRAINING for slot in self._slots.values())
+
+    def pending_accounts(self) -> set[str]:
+        return {account for slot in self._slots.values() for account in slot.pending}
+
+    def is_due_for_rotation(self, slot: Slot, now: datetime) -> bool:
+        return slot.started_at is not None and now - slot.started_at >= self.rotation_age
@@ -22,15 +22,21 @@ import asyncio
 from datetime import timedelta
 
 from core.worker import BaseWorker
+from core.worker_tuning import LIGHT_ORCHESTRATOR
+from libs.workflow_definitions.collectors.collect_workflow import collectors
+from libs.workflow_definitions.orchestrator.collect_orchestration_workflow import CollectOrchestrationDefinition, \
+    shard_requests
 from libs.workflow_definitions.queues import Queues
 from microservices.orchestrator.handlers.collect_orchestration.activities.get_running_slots_activity import \
     get_running_slots
+from microservices.orchestrator.handlers.collect_orchestration.activities.get_shard_config_activity import \
+    get_shard_config
 from microservices.orchestrator.handlers.collect_orchestration.activities.prepare_collect_activity import \
     prepare_collect
 from microservices.orchestrator.handlers.collect_orchestration.collect_orchestration_workflow import \
     CollectOrchestrationWorkflow
 
-OrchestratorWorker = BaseWorker(name="orchestrator")
+OrchestratorWorker = BaseWorker(name="orchestrator", tuning=LIGHT_ORCHESTRATOR)
 
 # OrchestratorWorker.handle_old(workflow=CollectOrchestrationWorkflow,
 #                           activities=[prepare_collect, get_running_slots])
@@ -38,8 +44,22 @@ OrchestratorWorker = BaseWorker(name="orchestrator")
 
 
 OrchestratorWorker.handle(handler=CollectOrchestrationWorkflow,
-                          activities=[prepare_collect, get_running_slots],
-                          schedule=timedelta(minutes=1))
+                          activities=[prepare_collect, get_running_slots, get_shard_config])
+
+# One long running orchestrator per platform shard, so a slow platform never delays the others.
+# The schedule only restarts a shard that stopped, it is skipped while the shard is running.
+# A running shard picks up a new ORCHESTRATOR_SHARDS when it continues as new, removed shards stop then.
+for platform in collectors:
+    for request in shard_requests(platform):
+        OrchestratorWorker.handle_schedule(
+            workflow=CollectOrchestrationWorkflow,
+            every=timedelta(minutes=5),
+            arg=request,
+            workflow_id=CollectOrchestrationDefinition.generate_workflow_id(platform=platform, shard=request.shard)
+        )
+
+# Schedules of shards that no longer exist
+OrchestratorWorker.retire_schedules(workflow_id_prefix=f'{CollectOrchestrationDefinition.name()}-')
 
 
 # OrchestratorWorker.handle_schedule(workflow=CollectOrchestrationWorkflow, every=timedelta(minutes=1))
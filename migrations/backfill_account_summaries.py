@@ -0,0 +1,110 @@
+"""Seeds the account summaries with the transactions written before accounts were summarized.
+
+Ingest only adds the transactions it inserts to a summary, so without this
+the summary of an account misses its whole history. Every summary is set to
+the totals of the transactions it should hold, the ones ingest has not yet
+added are left to ingest. Safe to run again, and while collectors are running:
+
+    python -m migrations.backfill_account_summaries
+"""
+import argparse
+import asyncio
+
+from bson import Decimal128
+from pymongo.errors import DuplicateKeyError
+
+from core.connections import Connections
+from libs.analytics.aggregations import account_flows
+from libs.data_types.platform import Platform
+from libs.schema.account_summary import AccountSummary, counterparty_register
+from libs.schema.collect_status import CollectStatus
+from libs.schema.raw_transaction import RawTransaction
+
+MAX_ATTEMPTS = 5
+
+
+async def backfill(batch_size: int) -> int:
+    collection = CollectStatus.get_motor_collection()
+    num_of_seeded = 0
+    last_id = None
+
+    while True:
+        # Seeding a batch outlives a server cursor, batches are read by _id instead
+        query = {'_id': {'$gt': last_id}} if last_id else {}
+        batch = await collection.find(query, projection={'account': 1, 'platform': 1}) \
+            .sort('_id', 1).limit(batch_size).to_list(None)
+        if not batch:
+            return num_of_seeded
+        last_id = batch[-1]['_id']
+
+        for status in batch:
+            if await _seed(Platform(status['platform']), status['account']):
+                num_of_seeded += 1
+        print(f"Seeded {num_of_seeded} account summaries")
+
+
+async def _seed(platform: Platform, account: str) -> bool:
+    collection = AccountSummary.get_motor_collection()
+
+    for _ in range(MAX_ATTEMPTS):
+        summary = await collection.find_one({'account': account, 'platform': platform},
+                                            projection={'applied_batches': 1})
+        applied_batches = summary.get('applied_batches', []) if summary else []
+
+        # The transactions the summary holds, those still waiting for ingest are summed by it
+        summarized = {'$or': [{'summary_batch': {'$exists': False}},
+                              {'summary_batch': {'$in': applied_batches}}]}
+        flows = await account_flows(platform, accounts=[account], match=summarized)
+        if not flows:
+            return False
+
+        registers = await _counterparty_registers(platform, account)
+        try:
+            # Ingest applying a batch meanwhile changes applied_batches, the totals are then read again
+            result = await collection.update_one(
+                {'account': account, 'platform': platform, 'applied_batches': applied_batches},
+                {
+                    '$set': {
+                        'num_of_tx': flows[0].num_of_tx,
+                        'total_in': Decimal128(flows[0].inflow),
+                        'total_out': Decimal128(flows[0].outflow),
+                        'first_timestamp': flows[0].first_timestamp,
+                        'last_timestamp': flows[0].last_timestamp,
+                    },
+                    '$max': {f'counterparty_registers.{register}': value for register, value in registers.items()},
+                },
+                upsert=True
+            )
+        except DuplicateKeyError:
+            continue
+
+        if result.matched_count or result.upserted_id is not None:
+            return True
+
+    print(f"{platform}-{account} - Summary kept changing, run the migration again")
+    return False
+
+
+async def _counterparty_registers(platform: Platform, account: str) -> dict[str, int]:
+    pipeline = [
+        {'$match': {'metadata.platform': platform, 'metadata.account': account,
+                    '$or': [{'from_address': account}, {'to_address': account}]}},
+        {'$group': {'_id': {'$cond': [{'$eq': ['$to_address', account]}, '$from_address', '$to_address']}}},
+    ]
+
+    registers: dict[str, int] = {}
+    async for row in RawTransaction.get_motor_collection().aggregate(pipeline, allowDiskUse=True):
+        register, value = counterparty_register(row['_id'])
+        registers[register] = max(registers.get(register, 0), value)
+    return registers
+
+
+async def main(batch_size: int):
+    await Connections.init_mongo(document_models=[CollectStatus, RawTransaction, AccountSummary])
+    print(f"Done, seeded {await backfill(batch_size)} account summaries")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batch-size", type=int, default=1000)
+    asyncio.run(main(parser.parse_args().batch_size))
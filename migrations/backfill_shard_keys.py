@@ -0,0 +1,45 @@
+"""Sets the shard key of collect statuses written before statuses were sharded.
+
+Without one a status falls outside every shard once ``ORCHESTRATOR_SHARDS``
+is above 1. Safe to run again, and while the orchestrator is running:
+
+    python -m migrations.backfill_shard_keys
+"""
+import argparse
+import asyncio
+
+from pymongo import UpdateOne
+
+from core.connections import Connections
+from libs.schema.collect_status import CollectStatus, account_shard_key
+
+
+async def backfill(batch_size: int) -> int:
+    collection = CollectStatus.get_motor_collection()
+    cursor = collection.find(
+        {'$or': [{'shard_key': {'$exists': False}}, {'shard_key': {'$lt': 0}}]},
+        projection={'account': 1},
+        batch_size=batch_size
+    )
+
+    num_of_keyed = 0
+    while batch := await cursor.to_list(length=batch_size):
+        await collection.bulk_write([
+            UpdateOne({'_id': status['_id']}, {'$set': {'shard_key': account_shard_key(status['account'])}})
+            for status in batch
+        ], ordered=False)
+        num_of_keyed += len(batch)
+        print(f"Keyed {num_of_keyed} collect statuses")
+
+    return num_of_keyed
+
+
+async def main(batch_size: int):
+    await Connections.init_mongo(document_models=[CollectStatus])
+    print(f"Done, keyed {await backfill(batch_size)} collect statuses")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batch-size", type=int, default=1000)
+    asyncio.run(main(parser.parse_args().batch_size))
@@ -0,0 +1,61 @@
+"""Sets the natural key of raw transactions written before transactions were keyed.
+
+Safe to run again, and while collectors are running:
+
+    python -m migrations.backfill_transaction_keys
+"""
+import argparse
+import asyncio
+
+from pymongo import DeleteOne, UpdateOne
+from pymongo.errors import BulkWriteError
+
+from core.connections import Connections
+from libs.schema.raw_transaction import RawTransaction
+
+DUPLICATE_KEY_ERROR = 11000
+
+
+async def backfill(batch_size: int) -> tuple[int, int]:
+    collection = RawTransaction.get_motor_collection()
+    num_of_keyed, num_of_duplicates = 0, 0
+    last_id = None
+
+    while True:
+        # Walks the _id index once instead of rescanning for unkeyed transactions every batch
+        query = {'key': {'$exists': False}, **({'_id': {'$gt': last_id}} if last_id else {})}
+        # Keyed when loaded, the validator derives the key from the transaction
+        batch = await RawTransaction.find(query).sort('+_id').limit(batch_size).to_list()
+        if not batch:
+            return num_of_keyed, num_of_duplicates
+        last_id = batch[-1].id
+
+        try:
+            result = await collection.bulk_write(
+                [UpdateOne({'_id': raw_tx.id}, {'$set': {'key': raw_tx.key}}) for raw_tx in batch], ordered=False
+            )
+            num_of_keyed += result.modified_count
+        except BulkWriteError as e:
+            # The same transaction stored twice, only one of them can keep the key
+            duplicates = [batch[error['index']] for error in e.details['writeErrors']
+                          if error['code'] == DUPLICATE_KEY_ERROR]
+            if len(duplicates) < len(e.details['writeErrors']):
+                raise
+
+            await collection.bulk_write([DeleteOne({'_id': raw_tx.id}) for raw_tx in duplicates], ordered=False)
+            num_of_keyed += e.details['nModified']
+            num_of_duplicates += len(duplicates)
+
+        print(f"Keyed {num_of_keyed} transactions, removed {num_of_duplicates} duplicates")
+
+
+async def main(batch_size: int):
+    await Connections.init_mongo(document_models=[RawTransaction])
+    num_of_keyed, num_of_duplicates = await backfill(batch_size)
+    print(f"Done, keyed {num_of_keyed} transactions and removed {num_of_duplicates} duplicates")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batch-size", type=int, default=1000)
+    asyncio.run(main(parser.parse_args().batch_size))
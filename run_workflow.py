@@ -1,10 +1,9 @@
 import asyncio
 
-from temporalio.client import Client
 from temporalio.common import WorkflowIDReusePolicy
 from temporalio.exceptions import WorkflowAlreadyStartedError
 
-from core.converter import pydantic_data_converter
+from core.connections import Connections
 from libs.data_types.platform import Platform
 from microservices.collectors.handlers.collect.collect_workflow import CollectTask
 from libs.workflows.collect_orchestration.workflow import CollectOrchestrationWorkflow
@@ -12,7 +11,7 @@ from libs.workflows.collect_orchestration.workflow import CollectOrchestrationWo
 
 async def main():
     # Create client connected to server at the given address
-    client = await Client.connect("localhost:7233", data_converter=pydantic_data_converter)
+    client = await Connections.temporal()
 
     #
     # await client.create_schedule(
@@ -43,13 +42,13 @@ async def main():
     ]
 
     account = org[0]
-    task = CollectTask(platform=account["platform"], wallet=account["account"])
+    task = CollectTask(platform=account["platform"], wallets=[account["account"]], api_key="1")
 
     # Execute a workflow
     try:
         # handle = await client.start_workflow(
         #     CollectOrchestrationWorkflow.run, task,
-        #     id=f'collect-{task.platform}-{task.wallet}', task_queue="core_queue",
+        #     id=f'collect-{task.platform}-{task.wallets[0]}', task_queue="core_queue",
         #     id_reuse_policy=WorkflowIDReusePolicy.ALLOW_DUPLICATE,
         # )
         handle = await client.start_workflow(
@@ -0,0 +1,21 @@
+import pytest
+
+from libs.collect.rate_limiter import LocalTokenBucket, RateLimit
+from libs.data_types.platform import Platform
+
+
+@pytest.mark.asyncio
+async def test_local_bucket_allows_burst():
+    bucket = LocalTokenBucket(Platform.ETHEREUM, "1", RateLimit(rate=1, burst=3))
+
+    waits = [await bucket.try_acquire(1) for _ in range(3)]
+
+    assert waits == [0, 0, 0]
+
+
+@pytest.mark.asyncio
+async def test_local_bucket_waits_for_refill_when_empty():
+    bucket = LocalTokenBucket(Platform.ETHEREUM, "1", RateLimit(rate=2, burst=1))
+
+    assert await bucket.try_acquire(1) == 0
+    assert await bucket.try_acquire(1) == pytest.approx(0.5, abs=0.01)
@@ -0,0 +1,52 @@
+from collections import Counter
+from datetime import datetime, timedelta, UTC
+
+from libs.data_types.platform import Platform
+from libs.data_types.priority_tier import PriorityTier
+from libs.scheduling.policies import AccountStats, CandidateOrder, ExpectedYieldPolicy, OldestFirstPolicy
+from libs.scheduling.scheduler import candidate_pool, select_accounts
+
+NOW = datetime(2024, 1, 1, tzinfo=UTC)
+
+
+def _stats(account: str, hours_ago: float, tx_rate: float = 0.0,
+           tier: PriorityTier = PriorityTier.STANDARD) -> AccountStats:
+    return AccountStats(account=account, platform=Platform.ETHEREUM,
+                        last_synced_at=NOW - timedelta(hours=hours_ago),
+                        last_collected_at=NOW - timedelta(hours=hours_ago),
+                        tx_rate=tx_rate, priority_tier=tier)
+
+
+def test_oldest_first_picks_oldest_cursor():
+    candidates = [_stats("new", 1), _stats("old", 10), _stats("mid", 5)]
+
+    selected = select_accounts(candidates, 2, OldestFirstPolicy(), NOW)
+
+    assert [stats.account for stats in selected] == ["old", "mid"]
+
+
+def test_expected_yield_prefers_busy_accounts():
+    candidates = [_stats("dormant", 10, tx_rate=0.0), _stats("busy", 1, tx_rate=20.0)]
+
+    selected = select_accounts(candidates, 1, ExpectedYieldPolicy(), NOW)
+
+    assert selected[0].account == "busy"
+
+
+def test_tiers_share_picks_by_weight():
+    candidates = [_stats(f"standard-{i}", 10, tier=PriorityTier.STANDARD) for i in range(20)] + \
+                 [_stats(f"enterprise-{i}", 1, tier=PriorityTier.ENTERPRISE) for i in range(20)]
+
+    selected = select_accounts(candidates, 10, OldestFirstPolicy(), NOW)
+
+    assert Counter(stats.priority_tier for stats in selected) == {PriorityTier.ENTERPRISE: 8,
+                                                                  PriorityTier.STANDARD: 2}
+
+
+def test_candidate_pool_takes_every_tier_in_every_order():
+    eligible = [_stats("stale", 10), _stats("busy", 1, tx_rate=50.0), _stats("fresh", 1),
+                _stats("enterprise", 1, tier=PriorityTier.ENTERPRISE)]
+
+    pool = candidate_pool(eligible, 1, (CandidateOrder.OLDEST_CURSOR, CandidateOrder.BUSIEST))
+
+    assert {stats.account for stats in pool} == {"stale", "busy", "enterprise"}
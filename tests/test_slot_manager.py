@@ -0,0 +1,119 @@
+from datetime import datetime, timedelta, UTC
+
+from libs.data_types.platform import Platform
+from libs.workflow_definitions.orchestrator.collect_orchestration_workflow import CollectOrchestrationRequest
+from microservices.orchestrator.handlers.collect_orchestration.activities.get_running_slots_activity import \
+    RunningSlot
+from microservices.orchestrator.handlers.collect_orchestration.slot_manager import SlotManager, SlotStatus, \
+    VISIBILITY_LAG
+
+NOW = datetime(2024, 1, 1, tzinfo=UTC)
+
+
+def _manager(num_of_slots: int = 2, shard: int = 0, num_of_shards: int = 1) -> SlotManager:
+    request = CollectOrchestrationRequest(platform=Platform.ETHEREUM, shard=shard, num_of_shards=num_of_shards,
+                                          num_of_slots=num_of_slots)
+    return SlotManager(request, [str(i) for i in range(num_of_slots)], rotation_age=timedelta(hours=1),
+                       max_accounts_per_slot=4)
+
+
+def test_shard_only_holds_its_slots():
+    slots = _manager(num_of_slots=5, shard=1, num_of_shards=2)
+
+    assert [slot.id for slot in slots.free_slots()] == [1, 3]
+
+
+def test_drained_slot_hands_its_accounts_over_once_freed():
+    slots = _manager()
+    slot = slots.free_slots()[0]
+    slots.mark_running(slot, started_at=NOW, num_of_accounts=4)
+    slots.drain(slot, ["a", "b"])
+
+    assert slots.sync([RunningSlot(id=slot.id, start_time=NOW, num_of_accounts=4)], set(), NOW) == []
+    assert slot.status == SlotStatus.DRAINING
+
+    # Reported free while visibility still lists it
+    ready = slots.sync([RunningSlot(id=slot.id, start_time=NOW, num_of_accounts=4)], {slot.id}, NOW)
+
+    assert ready == [slot]
+    assert slot.status == SlotStatus.FREE
+    assert slots.pending_accounts() == {"a", "b"}
+
+    slots.mark_running(slot, started_at=NOW, num_of_accounts=2)
+
+    assert slots.pending_accounts() == set()
+    assert not slots.is_draining()
+
+
+def test_just_started_slot_survives_visibility_lag():
+    slots = _manager()
+    slot = slots.free_slots()[0]
+    slots.mark_running(slot, started_at=NOW, num_of_accounts=4)
+
+    slots.sync([], set(), NOW + VISIBILITY_LAG / 2)
+
+    assert slot.status == SlotStatus.RUNNING
+    assert slots.capacity(slot) == 0
+
+    slots.sync([], set(), NOW + VISIBILITY_LAG)
+
+    assert slot.status == SlotStatus.FREE
+    assert slots.capacity(slot) == 4
+
+
+def test_queued_accounts_count_until_visibility_catches_up():
+    slots = _manager()
+    slot = slots.free_slots()[0]
+    slots.mark_running(slot, started_at=NOW, num_of_accounts=1)
+    slots.queue(slot, 2, NOW + timedelta(hours=1))
+    running = [RunningSlot(id=slot.id, start_time=NOW, num_of_accounts=1)]
+
+    slots.sync(running, set(), NOW + timedelta(hours=1))
+
+    assert slot.num_of_accounts == 3
+
+    slots.sync(running, set(), NOW + timedelta(hours=1) + VISIBILITY_LAG)
+
+    assert slot.num_of_accounts == 1
+
+
+def test_slot_started_elsewhere_is_adopted_from_visibility():
+    slots = _manager()
+
+    slots.sync([RunningSlot(id=1, start_time=NOW, num_of_accounts=3)], set(), NOW)
+
+    assert [slot.id for slot in slots.running_slots()] == [1]
+    assert slots.capacity(slots.running_slots()[0]) == 1
+    assert slots.is_due_for_rotation(slots.running_slots()[0], NOW + timedelta(hours=1))
+
+
+def test_failed_start_keeps_slot_free_with_its_accounts():
+    slots = _manager()
+    slot = slots.free_slots()[0]
+    slots.mark_running(slot, started_at=NOW, num_of_accounts=4)
+    slots.drain(slot, ["a", "b"])
+    ready = slots.sync([RunningSlot(id=slot.id, start_time=NOW, num_of_accounts=4)], {slot.id}, NOW)
+
+    assert slots.start_failed(ready[0], ready[0].pending, NOW)
+    # Visibility still lists the previous workflow of the slot
+    ready = slots.sync([RunningSlot(id=slot.id, start_time=NOW, num_of_accounts=4)], set(), NOW)
+
+    assert ready == [slot]
+    assert slot.status == SlotStatus.FREE
+    assert slot.pending == ["a", "b"]
+    assert slot not in slots.free_slots()
+    assert slots.pending_accounts() == {"a", "b"}
+
+
+def test_failed_start_gives_up_once_visibility_lag_passed():
+    slots = _manager()
+    slot = slots.free_slots()[0]
+    running = [RunningSlot(id=slot.id, start_time=NOW, num_of_accounts=4)]
+
+    assert slots.start_failed(slot, ["a"], NOW)
+    assert slots.is_waiting_to_start()
+    assert not slots.start_failed(slot, ["a"], NOW + VISIBILITY_LAG)
+    slots.sync(running, set(), NOW + VISIBILITY_LAG)
+
+    assert slots.pending_accounts() == set()
+    assert slot.status == SlotStatus.RUNNING
@@ -0,0 +1,150 @@
+from datetime import datetime, timedelta, UTC
+
+import pytest
+from beanie import init_beanie
+from mongomock_motor import AsyncMongoMockClient
+
+from libs.data_types.platform import Platform
+from libs.data_types.priority_tier import PriorityTier
+from libs.scheduling.policies import CandidateOrder
+from libs.scheduling.status_cache import CollectStatusCache
+from libs.schema.collect_status import CollectStatus
+
+NOW = datetime(2024, 1, 1, tzinfo=UTC)
+
+
+async def _init_mongo() -> None:
+    client = AsyncMongoMockClient(tz_aware=True)
+    await init_beanie(database=client["test"], document_models=[CollectStatus])
+
+
+async def _insert(account: str, hours_ago: float, held_for: timedelta = timedelta(0), tx_rate: float = 0.0,
+                  tier: PriorityTier = PriorityTier.STANDARD) -> CollectStatus:
+    return await CollectStatus(account=account, platform=Platform.ETHEREUM,
+                               last_synced_at=NOW - timedelta(hours=hours_ago),
+                               last_collected_at=NOW - timedelta(hours=hours_ago),
+                               hold_until=NOW + held_for, tx_rate=tx_rate, priority_tier=tier).insert()
+
+
+def _accounts(cache: CollectStatusCache, k: int, now: datetime, exclude: set[str] | None = None,
+              orders: tuple[CandidateOrder, ...] = (CandidateOrder.OLDEST_CURSOR,)) -> list[str]:
+    return [stats.account for stats in cache.candidates(k, now, exclude or set(), orders=orders)]
+
+
+@pytest.mark.asyncio
+async def test_candidates_are_stalest_eligible_accounts():
+    await _init_mongo()
+    await _insert("new", 1)
+    await _insert("old", 10)
+    await _insert("mid", 5)
+    await _insert("held", 20, held_for=timedelta(hours=1))
+    cache = CollectStatusCache(Platform.ETHEREUM)
+
+    await cache.refresh(NOW)
+
+    assert _accounts(cache, 2, NOW) == ["old", "mid"]
+    assert _accounts(cache, 2, NOW, exclude={"old"}) == ["mid", "new"]
+
+
+@pytest.mark.asyncio
+async def test_held_account_becomes_eligible_when_hold_ends():
+    await _init_mongo()
+    await _insert("held", 10, held_for=timedelta(minutes=5))
+    await _insert("eligible", 1)
+    cache = CollectStatusCache(Platform.ETHEREUM)
+
+    await cache.refresh(NOW)
+
+    assert _accounts(cache, 2, NOW) == ["eligible"]
+    assert _accounts(cache, 2, NOW + timedelta(minutes=5)) == ["held", "eligible"]
+
+
+@pytest.mark.asyncio
+async def test_refresh_replaces_outdated_entries():
+    await _init_mongo()
+    status = await _insert("collected", 10)
+    await _insert("other", 5)
+    cache = CollectStatusCache(Platform.ETHEREUM)
+    await cache.refresh(NOW)
+
+    status.last_synced_at = NOW
+    status.hold_until = NOW + timedelta(hours=1)
+    await status.save()
+    await cache.refresh(NOW + timedelta(minutes=1))
+
+    # The entry pushed before the collect is skipped, the account waits for its new hold
+    assert _accounts(cache, 2, NOW + timedelta(minutes=1)) == ["other"]
+    assert _accounts(cache, 2, NOW + timedelta(hours=2)) == ["other", "collected"]
+
+
+@pytest.mark.asyncio
+async def test_most_recent_cursors_are_evicted():
+    await _init_mongo()
+    await _insert("old", 10)
+    await _insert("mid", 5)
+    cache = CollectStatusCache(Platform.ETHEREUM, max_entries=2)
+    await cache.refresh(NOW)
+
+    await _insert("older", 20, held_for=timedelta(minutes=1))
+    await cache.refresh(NOW + timedelta(minutes=1))
+
+    assert len(cache) == 2
+    assert _accounts(cache, 3, NOW + timedelta(minutes=1)) == ["older", "old"]
+
+
+@pytest.mark.asyncio
+async def test_compaction_drops_outdated_heap_entries():
+    await _init_mongo()
+    status = await _insert("account", 10)
+    cache = CollectStatusCache(Platform.ETHEREUM)
+    await cache.refresh(NOW)
+
+    for _ in range(2000):
+        cache._put(status, NOW)
+    cache._compact()
+
+    assert [len(heap) for heap in cache._eligible.values()] == [1, 1]
+    assert _accounts(cache, 1, NOW) == ["account"]
+
+
+@pytest.mark.asyncio
+async def test_dormant_accounts_on_hold_dont_crowd_out_eligible_ones():
+    await _init_mongo()
+    await _insert("dormant-1", 30, held_for=timedelta(days=7))
+    await _insert("dormant-2", 20, held_for=timedelta(days=7))
+    await _insert("eligible", 1)
+    cache = CollectStatusCache(Platform.ETHEREUM, max_entries=2)
+
+    await cache.refresh(NOW)
+
+    assert _accounts(cache, 2, NOW) == ["eligible"]
+
+
+@pytest.mark.asyncio
+async def test_held_accounts_are_evicted_first():
+    await _init_mongo()
+    await _insert("old", 10)
+    await _insert("mid", 5)
+    cache = CollectStatusCache(Platform.ETHEREUM, max_entries=2)
+    await cache.refresh(NOW)
+
+    await _insert("dormant", 20, held_for=timedelta(days=7))
+    await cache.refresh(NOW + timedelta(minutes=1))
+
+    assert len(cache) == 2
+    assert _accounts(cache, 2, NOW + timedelta(days=8)) == ["old", "mid"]
+
+
+@pytest.mark.asyncio
+async def test_candidates_cover_every_tier_and_order():
+    await _init_mongo()
+    await _insert("stale", 10)
+    await _insert("busy", 1, tx_rate=50.0)
+    await _insert("enterprise", 1, tier=PriorityTier.ENTERPRISE)
+    cache = CollectStatusCache(Platform.ETHEREUM)
+
+    await cache.refresh(NOW)
+
+    assert set(_accounts(cache, 1, NOW)) == {"stale", "enterprise"}
+    assert set(_accounts(cache, 1, NOW, orders=(CandidateOrder.OLDEST_CURSOR, CandidateOrder.BUSIEST))) == \
+           {"stale", "busy", "enterprise"}
@@ -0,0 +1,29 @@
+import hashlib
+from datetime import datetime
+from decimal import Decimal
+
+from libs.data_types.platform import Platform
+from libs.schema.raw_transaction import Metadata, RawTransaction, transaction_key
+
+TIMESTAMP = datetime(2024, 1, 1)
+
+
+def _raw_tx(amount: Decimal) -> RawTransaction:
+    return RawTransaction.model_construct(from_address="a", to_address="b", amount=amount, key="",
+                                          metadata=Metadata(account="acc", timestamp=TIMESTAMP,
+                                                            platform=Platform.ETHEREUM))
+
+
+def _legacy_key(amount: float) -> str:
+    parts = [Platform.ETHEREUM, "acc", "a", "b", str(amount), TIMESTAMP.isoformat()]
+    return hashlib.sha1('|'.join(parts).encode()).hexdigest()
+
+
+def test_decimal_amounts_keep_float_era_keys():
+    for amount in ["123", "123.00", "0.1", "0.00001"]:
+        assert transaction_key(_raw_tx(Decimal(amount))) == _legacy_key(float(amount))
+
+
+def test_amounts_beyond_float_precision_are_keyed_by_value():
+    assert (transaction_key(_raw_tx(Decimal("1.12345678901234567890"))) ==
+            transaction_key(_raw_tx(Decimal("1.123456789012345678900"))))